@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 """Multi-pair trading demonstration with portfolio management."""
 import asyncio
+import random
 import sys
 from decimal import Decimal
 from pathlib import Path
@@ -21,18 +22,18 @@ class MockAsyncAdapter:
         self.orders = {}
         self.order_counter = 0
     
-    async def place_limit_order(self, position_id: str, side: str, price: Decimal, qty: Decimal):
-        """Mock order placement."""
+    async def place_limit_buy(self, client_id: str, price: Decimal, qty: Decimal):
+        """Mock limit buy placement."""
         self.order_counter += 1
         order_id = f"{self.product_id}_order_{self.order_counter}"
         self.orders[order_id] = {
-            "position_id": position_id,
-            "side": side,
+            "client_id": client_id,
+            "side": "buy",
             "price": float(price),
             "qty": float(qty),
             "state": "pending"
         }
-        print(f"  [{self.product_id}] Placed {side} order {order_id}: {qty} @ ${price}")
+        print(f"  [{self.product_id}] Placed buy order {order_id}: {qty:.6f} @ ${price}")
         return order_id
     
     async def cancel_order(self, order_id: str):
@@ -42,7 +43,7 @@ class MockAsyncAdapter:
             print(f"  Cancelled order {order_id}")
         return True
     
-    async def place_stop_limit_order(self, position_id: str, stop_trigger: Decimal, stop_limit: Decimal, qty: Decimal):
+    async def place_stop_limit(self, client_id: str, trigger: Decimal, limit: Decimal, qty: Decimal):
         """Mock stop order placement."""
         order_id = f"{self.product_id}_stop_{self.order_counter}"
         return order_id
@@ -102,6 +103,7 @@ async def demo_multi_pair_trading():
             correlation_group="alts"
         ),
     ]
+    pair_by_id = {p.product_id: p for p in pair_configs}
     
     for pair in pair_configs:
         position_size_usd = portfolio_config.total_capital * pair.position_size_pct / 100
@@ -130,7 +132,6 @@ async def demo_multi_pair_trading():
     async def generate_signals(product_id: str):
         """Mock signal generation."""
         # Simulate 60% of pairs get entry signals
-        import random
         signal = random.random() < 0.6
         if signal:
             print(f"  ✓ BUY signal for {product_id}")
@@ -152,8 +153,8 @@ async def demo_multi_pair_trading():
     entries_by_pair = {}
     for product_id, should_enter in entry_signals.items():
         if should_enter:
-            pair = next(p for p in pair_configs if p.product_id == product_id)
-            position_size_usd = portfolio_config.total_capital * pair.position_size_pct / 100
+            pair = pair_by_id[product_id]
+            position_size_usd = orchestrator.portfolio_manager.get_position_size_usd(product_id)
             
             # Calculate quantity based on product price
             if product_id == "BTC-USD":
@@ -168,15 +169,37 @@ async def demo_multi_pair_trading():
             entries_by_pair[product_id] = {
                 "price": price,
                 "qty": qty,
-                "stop_trigger": price * (Decimal('1') - pair.trail_pct),
-                "stop_limit": price * (Decimal('1') - pair.trail_pct * Decimal('1.01'))
+                "stop_trigger": price * pair.trigger_mult,
+                "stop_limit": price * pair.stop_limit_mult
             }
     
     if entries_by_pair:
         print(f"Submitting {len(entries_by_pair)} coordinated entries with max concurrency of 2:")
-        # Note: Would actually submit here
-        # order_ids = await orchestrator.submit_coordinated_entries(entries_by_pair, max_concurrent=2)
-        print(f"  (Simulated submission of {len(entries_by_pair)} orders)")
+        # Orders are placed concurrently (bounded by max_concurrent); a failure on
+        # one pair does not cancel the others.
+        order_ids = await orchestrator.submit_coordinated_entries(entries_by_pair, max_concurrent=2)
+        print(f"  Submitted {len(order_ids)}/{len(entries_by_pair)} orders")
+        
+        # Record the whole batch in one transaction instead of one per pair
+        portfolio_positions = orchestrator.portfolio_manager.positions
+        position_ids = {pos.product_id: pid for pid, pos in portfolio_positions.items()}
+        persistence.save_positions_bulk(
+            (pid, pos.state) for pid, pos in portfolio_positions.items()
+        )
+        persistence.save_orders_bulk(
+            (
+                order_id,
+                position_ids.get(product_id),
+                {
+                    "type": "entry",
+                    "side": "buy",
+                    "price": str(entries_by_pair[product_id]["price"]),
+                    "qty": str(entries_by_pair[product_id]["qty"]),
+                },
+                "pending",
+            )
+            for product_id, order_id in order_ids.items()
+        )
     else:
         print("No entry signals triggered - holding cash")
     
@@ -259,4 +282,9 @@ async def demo_multi_pair_trading():
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop  # type: ignore  # optional: pip install quant-trade[performance]
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(demo_multi_pair_trading())
@@ -134,4 +134,9 @@ async def main():
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop  # type: ignore  # optional: pip install quant-trade[performance]
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
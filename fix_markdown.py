@@ -1,30 +1,79 @@
 import re
+from concurrent.futures import ProcessPoolExecutor
 
 files = ["README.md", "CONTRIBUTING.md", "IMPROVEMENTS_PHASE2.md"]
 
-for fname in files:
-    with open(fname, "r", encoding="utf-8") as f:
-        content = f.read()
+_HEADING = re.compile(r"#+\s")
+_LIST_ITEM = re.compile(r"[-*] ")
+_SECURITY_EMAIL = re.compile(r"(?<![<\[:])security@yourdomain\.com(?![>\]])")
+
+
+def fix_content(content):
+    """Apply all markdown fixes in a single pass over the lines of ``content``.
+
+    - Blank line before list blocks (MD032)
+    - Blank lines around fenced code blocks (MD031)
+    - Language tag on bare opening fences (MD040)
+    - Blank line before headings (MD022)
+    - Wrap the bare security contact address
+    """
+    out = []
+    prev = ""  # previous emitted line, without its newline
+    in_fence = False
+    after_fence = False
+
+    for raw in content.splitlines(keepends=True):
+        line = raw.rstrip("\r\n")
+        newline = raw[len(line):]
+        prev_blank = not prev.strip()
 
-    # Fix blanks around lists (MD032)
-    content = re.sub(r"(\S)\n([-*] [^\n]+\n)", r"\1\n\n\2", content)
+        # Only a bare fence closes a block; "```lang" inside one is content.
+        if line.startswith("```") and not (in_fence and line.strip() != "```"):
+            if not in_fence:
+                if not prev_blank:
+                    out.append("\n")
+                if line.strip() == "```":
+                    line = "```text"
+            in_fence = not in_fence
+            out.append(line + newline)
+            prev = line
+            after_fence = not in_fence
+            continue
 
-    # Fix blanks around fences (MD031)
-    content = re.sub(r"(\S)\n(```)", r"\1\n\n```", content)
-    content = re.sub(r"(```)\n(\S)", r"\1\n\n\2", content)
+        if not in_fence and line.strip():
+            needs_blank = after_fence or (
+                not prev_blank
+                and (
+                    _HEADING.match(line)
+                    or (_LIST_ITEM.match(line) and not _LIST_ITEM.match(prev.lstrip()))
+                )
+            )
+            if needs_blank:
+                out.append("\n")
+            line = _SECURITY_EMAIL.sub("<security@yourdomain.com>", line)
 
-    # Add language to fenced code blocks (MD040)
-    content = re.sub(r"\n```\n", r"\n```text\n", content)
+        out.append(line + newline)
+        prev = line
+        after_fence = False
 
-    # Fix heading spacing (MD022)
-    content = re.sub(r"(\S)\n(#+\s)", r"\1\n\n\2", content)
+    return "".join(out)
 
-    # Wrap bare URLs
-    content = content.replace("security@yourdomain.com", "<security@yourdomain.com>")
+
+def fix_one(fname):
+    """Fix a single markdown file in place."""
+    with open(fname, "r", encoding="utf-8") as f:
+        content = f.read()
 
     with open(fname, "w", encoding="utf-8") as f:
-        f.write(content)
+        f.write(fix_content(content))
+
+    return fname
+
 
-    print(f"✓ Fixed {fname}")
+if __name__ == "__main__":
+    # Files are independent, so fan them out across processes.
+    with ProcessPoolExecutor() as ex:
+        for fname in ex.map(fix_one, files):
+            print(f"✓ Fixed {fname}")
 
-print("✓ All markdown errors fixed!")
+    print("✓ All markdown errors fixed!")
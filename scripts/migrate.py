@@ -10,6 +10,7 @@ python scripts/migrate.py --db state.db rollback --last
 """
 import argparse
 import sqlite3
+from contextlib import closing
 from pathlib import Path
 import sys
 from pathlib import Path as _Path
@@ -19,6 +20,27 @@ sys.path.insert(0, str(_Path(__file__).resolve().parents[1]))
 from trading.db_migrations import MIGRATIONS, apply_migrations, rollback_last, rollback_migration
 
 
+def connect(db: Path) -> sqlite3.Connection:
+    """Open the migration connection in WAL mode with I/O-friendly pragmas."""
+    conn = sqlite3.connect(str(db), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")
+    return conn
+
+
+def _pending(conn):
+    """Return the migration versions not yet recorded in schema_migrations (read-only)."""
+    cur = conn.cursor()
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_migrations'")
+    if cur.fetchone() is None:
+        return sorted(MIGRATIONS.keys())
+    cur.execute("SELECT version FROM schema_migrations")
+    applied = {row[0] for row in cur.fetchall()}
+    return sorted(v for v in MIGRATIONS.keys() if v not in applied)
+
+
 def list_migrations(conn):
     cur = conn.cursor()
     cur.execute("SELECT version, applied_at FROM schema_migrations ORDER BY version")
@@ -30,7 +52,8 @@ def list_migrations(conn):
         print(f"  {v}: {status} (applied_at={when})")
 
 
-def main():
+def main(argv=None) -> int:
+    """Run the CLI with ``argv`` (defaults to ``sys.argv[1:]``); returns the exit code."""
     parser = argparse.ArgumentParser()
     parser.add_argument("--db", required=True, help="Path to sqlite DB file")
     sub = parser.add_subparsers(dest="cmd")
@@ -45,100 +68,92 @@ def main():
     rb.add_argument("--dry-run", action="store_true", help="Show which migration would be rolled back without performing it")
     rb.add_argument("--yes", action="store_true", help="Do not prompt for confirmation when rolling back")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     db = Path(args.db)
     db.parent.mkdir(parents=True, exist_ok=True)
 
-    conn = sqlite3.connect(str(db), timeout=30)
+    with closing(connect(db)) as conn:
+        if args.cmd == "list":
+            list_migrations(conn)
+            return 0
 
-    if args.cmd == "list":
-        list_migrations(conn)
-        return
-
-    if args.cmd == "apply":
-        if getattr(args, 'dry_run', False):
-            # show pending migrations without applying
-            cur = conn.cursor()
-            # Create schema_migrations table if missing so we can query it
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS schema_migrations (
-                    version INTEGER PRIMARY KEY,
-                    applied_at TEXT NOT NULL
-                )
-                """
-            )
-            conn.commit()
-            cur.execute("SELECT version FROM schema_migrations ORDER BY version")
-            applied = {row[0] for row in cur.fetchall()}
-            pending = sorted(v for v in MIGRATIONS.keys() if v not in applied)
-            if pending:
-                print("Pending migrations:", pending)
-            else:
-                print("No pending migrations; database up-to-date.")
-            return
-
-        applied = apply_migrations(conn)
-        if applied:
-            print("Applied migrations:", applied)
-        else:
-            print("No migrations applied; database up-to-date.")
-        return
-
-    if args.cmd == "rollback":
-        if args.version:
+        if args.cmd == "apply":
+            pending = _pending(conn)
             if getattr(args, 'dry_run', False):
-                print(f"Would rollback migration {args.version} (dry-run)")
-                return
-            if not getattr(args, 'yes', False):
-                # For non-interactive/test runs, auto-confirm; for interactive, prompt.
-                try:
-                    confirm = input(f"Are you sure you want to rollback migration {args.version}? This may DROP data. Type 'yes' to continue: ")
-                    if confirm.strip().lower() != 'yes':
-                        print("Aborted.")
-                        return
-                except (EOFError, BrokenPipeError):
-                    # Non-interactive or piped stdin; auto-confirm
-                    pass
-            rollback_migration(conn, args.version)
-            print(f"Rolled back migration {args.version}")
-            return
-        if args.last:
-            if getattr(args, 'dry_run', False):
-                cur = conn.cursor()
-                cur.execute("SELECT version FROM schema_migrations ORDER BY version DESC LIMIT 1")
-                row = cur.fetchone()
-                if not row:
-                    print("No applied migrations to rollback")
+                # show pending migrations without applying
+                if pending:
+                    print("Pending migrations:", pending)
                 else:
-                    print(f"Would rollback migration {row[0]} (dry-run)")
-                return
-
-            if not getattr(args, 'yes', False):
-                cur = conn.cursor()
-                cur.execute("SELECT version FROM schema_migrations ORDER BY version DESC LIMIT 1")
-                row = cur.fetchone()
-                if not row:
-                    print("No applied migrations to rollback")
-                    return
-                try:
-                    confirm = input(f"Are you sure you want to rollback the last migration {row[0]}? This may DROP data. Type 'yes' to continue: ")
-                    if confirm.strip().lower() != 'yes':
-                        print("Aborted.")
-                        return
-                except (EOFError, BrokenPipeError):
-                    # Non-interactive or piped stdin; auto-confirm
-                    pass
-
-            v = rollback_last(conn)
-            if v is None:
-                print("No applied migrations to rollback")
+                    print("No pending migrations; database up-to-date.")
+                return 0
+
+            if not pending:
+                # Already up to date: skip apply_migrations and its write transaction
+                print("No migrations applied; database up-to-date.")
+                return 0
+
+            applied = apply_migrations(conn)
+            if applied:
+                print("Applied migrations:", applied)
             else:
-                print(f"Rolled back migration {v}")
-            return
+                print("No migrations applied; database up-to-date.")
+            return 0
+
+        if args.cmd == "rollback":
+            if args.version:
+                if getattr(args, 'dry_run', False):
+                    print(f"Would rollback migration {args.version} (dry-run)")
+                    return 0
+                if not getattr(args, 'yes', False):
+                    # For non-interactive/test runs, auto-confirm; for interactive, prompt.
+                    try:
+                        confirm = input(f"Are you sure you want to rollback migration {args.version}? This may DROP data. Type 'yes' to continue: ")
+                        if confirm.strip().lower() != 'yes':
+                            print("Aborted.")
+                            return 0
+                    except (EOFError, BrokenPipeError):
+                        # Non-interactive or piped stdin; auto-confirm
+                        pass
+                rollback_migration(conn, args.version)
+                print(f"Rolled back migration {args.version}")
+                return 0
+            if args.last:
+                if getattr(args, 'dry_run', False):
+                    cur = conn.cursor()
+                    cur.execute("SELECT version FROM schema_migrations ORDER BY version DESC LIMIT 1")
+                    row = cur.fetchone()
+                    if not row:
+                        print("No applied migrations to rollback")
+                    else:
+                        print(f"Would rollback migration {row[0]} (dry-run)")
+                    return 0
+
+                if not getattr(args, 'yes', False):
+                    cur = conn.cursor()
+                    cur.execute("SELECT version FROM schema_migrations ORDER BY version DESC LIMIT 1")
+                    row = cur.fetchone()
+                    if not row:
+                        print("No applied migrations to rollback")
+                        return 0
+                    try:
+                        confirm = input(f"Are you sure you want to rollback the last migration {row[0]}? This may DROP data. Type 'yes' to continue: ")
+                        if confirm.strip().lower() != 'yes':
+                            print("Aborted.")
+                            return 0
+                    except (EOFError, BrokenPipeError):
+                        # Non-interactive or piped stdin; auto-confirm
+                        pass
+
+                v = rollback_last(conn)
+                if v is None:
+                    print("No applied migrations to rollback")
+                else:
+                    print(f"Rolled back migration {v}")
+                return 0
 
     parser.print_help()
+    return 0
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -7,9 +7,10 @@ Usage:
     python scripts/order_manager.py --db state.db force-exit <position_id> <exit_price>
 """
 import argparse
-import sqlite3
 import sys
 from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -25,52 +26,36 @@ def list_orders(persistence):
         print("No positions found")
         return
     
-    total_orders = 0
-    for pos_id in position_ids:
-        pos = persistence.load_position(pos_id)
-        orders = persistence.list_orders(position_id=pos_id)
-        if orders:
-            print(f"\n=== Position {pos_id} ===")
-            print(f"{'Order ID':<20} {'Type':<12} {'State':<10} {'Price':<12} {'Qty':<10}")
-            print("-" * 65)
-            for order in orders:
-                order_id = order.get('order_id', 'unknown')
-                order_type = order.get('type', 'unknown')
-                state = order.get('state', 'unknown')
-                price = order.get('price', 'N/A')
-                qty = order.get('qty', 'N/A')
-                print(f"{order_id:<20} {order_type:<12} {state:<10} {price:<12} {qty:<10}")
-                total_orders += 1
-    
-    print(f"\nTotal orders: {total_orders}")
+    rows = persistence.list_all_orders_with_positions()
+    row_fmt = "{:<20} {:<12} {:<10} {:<12} {:<10}\n".format
+    header = row_fmt('Order ID', 'Type', 'State', 'Price', 'Qty')
+    
+    # Build the whole report and write it once rather than print() per line
+    out = []
+    for pos_id, orders in groupby(rows, key=itemgetter("position_id")):
+        out.append(f"\n=== Position {pos_id} ===\n")
+        out.append(header)
+        out.append("-" * 65 + "\n")
+        for order in orders:
+            # Normalize every column to str once so formatting is plain padding
+            out.append(row_fmt(
+                str(order.get('order_id', 'unknown')),
+                str(order.get('type', 'unknown')),
+                str(order.get('state') or 'unknown'),
+                str(order.get('price', 'N/A')),
+                str(order.get('qty', 'N/A')),
+            ))
+    
+    out.append(f"\nTotal orders: {len(rows)}\n")
+    sys.stdout.write("".join(out))
 
 
 def cancel_order(persistence, order_id):
     """Mark an order as cancelled (for tracking; actual cancellation via API)."""
-    # Get the order to find its position
-    all_positions = persistence.list_positions()
-    target_position = None
-    
-    for pos_id in all_positions:
-        orders = persistence.list_orders(position_id=pos_id)
-        for order in orders:
-            if order.get('order_id') == order_id:
-                target_position = pos_id
-                break
-    
-    if not target_position:
+    if not persistence.update_order_state(order_id, "cancelled"):
         print(f"Order not found: {order_id}")
         return
     
-    # Update order state to cancelled
-    cur = sqlite3.connect(str(persistence.path)).cursor()
-    cur.execute(
-        "UPDATE orders SET state = ? WHERE order_id = ?",
-        ("cancelled", order_id)
-    )
-    cur.connection.commit()
-    cur.connection.close()
-    
     print(f"Order marked as cancelled: {order_id}")
     print("Note: Use Coinbase API to actually cancel the order on the exchange")
 
@@ -100,22 +85,23 @@ def force_exit(persistence, position_id, exit_price):
         "created_at": "",
     }
     
-    persistence.save_order(f"{position_id}_force_exit", position_id, exit_order, "filled")
-    
     # Calculate P&L before closing position
     realized_pnl = (exit_price_dec - pos.entry_price) * qty_at_exit
     realized_pnl_percent = (realized_pnl / (pos.entry_price * qty_at_exit) * 100) if pos.entry_price > 0 else Decimal('0')
     
-    # Update position: mark as closed
+    # Record the exit order and close the position atomically
     pos.qty_filled = Decimal('0')
-    persistence.save_position(pos, position_id)
+    with persistence.transaction():
+        persistence.save_order(f"{position_id}_force_exit", position_id, exit_order, "filled")
+        persistence.save_position(pos, position_id)
     
     print(f"Position {position_id} force-exited at ${exit_price_dec}")
     print(f"Entry: ${pos.entry_price}, Exit: ${exit_price_dec}")
     print(f"Realized P&L: ${realized_pnl} ({realized_pnl_percent:.2f}%)")
 
 
-def main():
+def main(argv=None) -> int:
+    """Run the CLI with ``argv`` (defaults to ``sys.argv[1:]``); returns the exit code."""
     parser = argparse.ArgumentParser(description="Order management CLI")
     parser.add_argument("--db", required=True, help="Path to SQLite database")
     
@@ -130,14 +116,14 @@ def main():
     exit_cmd.add_argument("position_id")
     exit_cmd.add_argument("exit_price", type=float)
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     db_path = Path(args.db)
-    if not db_path.exists():
+    try:
+        persistence = SQLitePersistence(db_path, create=False)
+    except FileNotFoundError:
         print(f"Database not found: {db_path}")
-        sys.exit(1)
-    
-    persistence = SQLitePersistence(db_path)
+        return 1
     
     if args.cmd == "list":
         list_orders(persistence)
@@ -149,7 +135,8 @@ def main():
         parser.print_help()
     
     persistence.close()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -2,7 +2,9 @@
 """Portfolio dashboard CLI: view portfolio status and multi-pair metrics."""
 import argparse
 import sys
-from decimal import Decimal
+from collections import defaultdict
+from itertools import accumulate
+from operator import itemgetter
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -21,18 +23,25 @@ def format_pct(pct, decimals=2):
     return f"{color}{abs(pct):.{decimals}f}%"
 
 
-def portfolio_summary(persistence):
+def product_label(pos_id):
+    """Display name for a position id (e.g., "BTC_001" → "BTC-USD")."""
+    return pos_id.replace("_001", "-USD").replace("_", "-")
+
+
+def portfolio_summary(persistence, positions=None):
     """Show portfolio-level summary."""
-    position_ids = persistence.list_positions()
+    if positions is None:
+        positions = persistence.load_all_positions()
     
-    if not position_ids:
+    if not positions:
         print("No positions found")
         return
     
-    total_capital = Decimal('100000')  # Would come from config
-    total_entry_capital = Decimal('0')
-    total_unrealized_pnl = Decimal('0')
-    total_realized_pnl = Decimal('0')
+    # Display-only math: plain floats are plenty for 2-decimal output
+    total_capital = 100000.0  # Would come from config
+    total_entry_capital = 0.0
+    total_unrealized_pnl = 0.0
+    total_realized_pnl = 0.0
     active_count = 0
     closed_count = 0
     
@@ -40,12 +49,10 @@ def portfolio_summary(persistence):
     print("PORTFOLIO DASHBOARD")
     print("=" * 90)
     
-    for pos_id in position_ids:
-        pos = persistence.load_position(pos_id)
-        if pos and pos.qty_filled > 0:
+    for pos in positions.values():
+        if pos.qty_filled > 0:
             active_count += 1
-            entry_notional = pos.entry_price * pos.qty_filled
-            total_entry_capital += entry_notional
+            total_entry_capital += float(pos.entry_price) * float(pos.qty_filled)
         else:
             closed_count += 1
     
@@ -62,56 +69,56 @@ def portfolio_summary(persistence):
     print(f"  Closed Positions:   {closed_count}")
     
     print(f"\nPairs Status:")
-    print(f"{'Product':<15} {'Qty':<12} {'Entry Price':<15} {'Highest':<15} {'Stop':<15} {'Status':<10}")
-    print("-" * 90)
-    
-    for pos_id in position_ids:
-        pos = persistence.load_position(pos_id)
-        if pos:
-            status = "OPEN" if pos.qty_filled > 0 else "CLOSED"
-            # Extract product from position_id (e.g., "BTC_001" → "BTC-USD")
-            product = pos_id.replace("_001", "-USD").replace("_", "-")
-            print(
-                f"{product:<15} "
-                f"{float(pos.qty_filled):<12.4f} "
-                f"{float(pos.entry_price):<15.2f} "
-                f"{float(pos.highest_price_since_entry):<15.2f} "
-                f"{float(pos.current_stop_trigger or 0):<15.2f} "
-                f"{status:<10}"
-            )
-
-
-def position_concentration(persistence):
+    lines = [
+        f"{'Product':<15} {'Qty':<12} {'Entry Price':<15} {'Highest':<15} {'Stop':<15} {'Status':<10}",
+        "-" * 90,
+    ]
+    
+    row_fmt = "{:<15} {:<12.4f} {:<15.2f} {:<15.2f} {:<15.2f} {:<10}".format
+    for pos_id, pos in positions.items():
+        lines.append(row_fmt(
+            product_label(pos_id),
+            float(pos.qty_filled),
+            float(pos.entry_price),
+            float(pos.highest_price_since_entry),
+            float(pos.current_stop_trigger or 0),
+            "OPEN" if pos.qty_filled > 0 else "CLOSED",
+        ))
+    
+    # One write for the whole table instead of a print() per row
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+def position_concentration(persistence, positions=None):
     """Show position concentration analysis."""
-    position_ids = persistence.list_positions()
+    if positions is None:
+        positions = persistence.load_all_positions()
     
-    if not position_ids:
+    if not positions:
         print("No positions found")
         return
     
     positions_by_size = []
-    total_capital = Decimal('100000')
+    total_capital = 100000.0
     
-    for pos_id in position_ids:
-        pos = persistence.load_position(pos_id)
-        if pos and pos.qty_filled > 0:
-            notional = pos.entry_price * pos.qty_filled
+    for pos_id, pos in positions.items():
+        if pos.qty_filled > 0:
+            notional = float(pos.entry_price) * float(pos.qty_filled)
             pct_of_capital = (notional / total_capital * 100) if total_capital > 0 else 0
             positions_by_size.append((pos_id, notional, pct_of_capital))
     
-    # Sort by size
-    positions_by_size.sort(key=lambda x: x[1], reverse=True)
+    # Sort by size (float keys), then running totals in one pass
+    positions_by_size.sort(key=itemgetter(1), reverse=True)
+    cumulative = list(accumulate(pct for _, _, pct in positions_by_size))
     
     print("\n" + "=" * 70)
     print("POSITION CONCENTRATION")
     print("=" * 70)
     
-    cumulative_pct = 0
     print(f"\n{'Rank':<6} {'Position':<20} {'Size':<15} {'% Capital':<15} {'Cumulative':<15}")
     print("-" * 70)
     
-    for idx, (pos_id, notional, pct) in enumerate(positions_by_size, 1):
-        cumulative_pct += pct
+    for idx, ((pos_id, notional, pct), cumulative_pct) in enumerate(zip(positions_by_size, cumulative), 1):
         print(
             f"{idx:<6} "
             f"{pos_id:<20} "
@@ -121,38 +128,31 @@ def position_concentration(persistence):
         )
     
     if positions_by_size:
-        top_3_pct = sum(pct for _, _, pct in positions_by_size[:3])
+        top_3_pct = cumulative[min(3, len(cumulative)) - 1]
         print(f"\nTop 3 Concentration: {top_3_pct:.1f}%")
         largest_pct = positions_by_size[0][2]
         print(f"Largest Position: {largest_pct:.1f}%")
 
 
-def pair_comparison(persistence):
+def pair_comparison(persistence, positions=None):
     """Compare performance across pairs."""
-    position_ids = persistence.list_positions()
+    if positions is None:
+        positions = persistence.load_all_positions()
     
-    if not position_ids:
+    if not positions:
         print("No positions found")
         return
     
-    pairs_data = {}
-    
-    for pos_id in position_ids:
-        pos = persistence.load_position(pos_id)
-        if pos:
-            # Extract product from position_id
-            product = pos_id.split("_")[0]
-            if product not in pairs_data:
-                pairs_data[product] = {
-                    "positions": [],
-                    "total_entry": Decimal('0'),
-                    "total_current_price": Decimal('0'),
-                }
-            
-            pairs_data[product]["positions"].append(pos)
-            if pos.qty_filled > 0:
-                entry_notional = pos.entry_price * pos.qty_filled
-                pairs_data[product]["total_entry"] += entry_notional
+    # One pass to bucket positions by pair: [position count, active count, entry capital]
+    pairs_data = defaultdict(lambda: [0, 0, 0.0])
+    
+    for pos_id, pos in positions.items():
+        # Extract product from position_id (no intermediate list like split())
+        data = pairs_data[pos_id.partition("_")[0]]
+        data[0] += 1
+        if pos.qty_filled > 0:
+            data[1] += 1
+            data[2] += float(pos.entry_price) * float(pos.qty_filled)
     
     print("\n" + "=" * 100)
     print("PAIR COMPARISON")
@@ -161,23 +161,22 @@ def pair_comparison(persistence):
     print(f"\n{'Pair':<15} {'Positions':<15} {'Capital':<15} {'Avg Entry':<15} {'Status':<20}")
     print("-" * 100)
     
-    for product in sorted(pairs_data.keys()):
-        data = pairs_data[product]
-        pos_count = len(data["positions"])
-        avg_entry = data["total_entry"] / pos_count if pos_count > 0 else Decimal('0')
-        active_count = sum(1 for p in data["positions"] if p.qty_filled > 0)
+    for product in sorted(pairs_data):
+        pos_count, active_count, total_entry = pairs_data[product]
+        avg_entry = total_entry / pos_count
         status = f"{active_count} active, {pos_count - active_count} closed"
         
         print(
             f"{product:<15} "
             f"{pos_count:<15} "
-            f"{format_currency(data['total_entry']):<15} "
+            f"{format_currency(total_entry):<15} "
             f"{format_currency(avg_entry):<15} "
             f"{status:<20}"
         )
 
 
-def main():
+def main(argv=None) -> int:
+    """Run the CLI with ``argv`` (defaults to ``sys.argv[1:]``); returns the exit code."""
     parser = argparse.ArgumentParser(description="Portfolio dashboard CLI")
     parser.add_argument("--db", required=True, help="Path to SQLite database")
     
@@ -185,19 +184,16 @@ def main():
     sub.add_parser("summary")
     sub.add_parser("concentration")
     sub.add_parser("pairs")
+    sub.add_parser("all", help="Show summary, concentration and pairs from one load")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     db_path = Path(args.db)
-    if not db_path.exists():
+    try:
+        persistence = SQLitePersistence(db_path, create=False)
+    except FileNotFoundError:
         print(f"Database not found: {db_path}")
-        sys.exit(1)
-    
-    persistence = SQLitePersistence(db_path)
-    
-    # Import Decimal here to avoid circular imports
-    from decimal import Decimal
-    globals()['Decimal'] = Decimal
+        return 1
     
     if args.cmd == "summary":
         portfolio_summary(persistence)
@@ -205,11 +201,17 @@ def main():
         position_concentration(persistence)
     elif args.cmd == "pairs":
         pair_comparison(persistence)
+    elif args.cmd == "all":
+        # Fetch once and render every view from the same snapshot
+        positions = persistence.load_all_positions()
+        for view in (portfolio_summary, position_concentration, pair_comparison):
+            view(persistence, positions)
     else:
         parser.print_help()
     
     persistence.close()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -24,27 +24,31 @@ def format_decimal(d, decimals=2):
 
 def list_positions(persistence):
     """List all open positions."""
-    position_ids = persistence.list_positions()
+    positions = persistence.load_all_positions()
     
-    if not position_ids:
+    if not positions:
         print("No open positions")
         return
     
-    print(f"\n{'Position ID':<20} {'Qty':<12} {'Entry Price':<15} {'Highest':<15} {'Stop Trigger':<15} {'Status':<10}")
-    print("-" * 90)
+    lines = [
+        f"\n{'Position ID':<20} {'Qty':<12} {'Entry Price':<15} {'Highest':<15} {'Stop Trigger':<15} {'Status':<10}",
+        "-" * 90,
+    ]
     
-    for pos_id in position_ids:
-        pos = persistence.load_position(pos_id)
-        if pos:
-            status = "OPEN" if pos.qty_filled > 0 else "CLOSED"
-            print(
-                f"{pos_id:<20} "
-                f"{format_decimal(pos.qty_filled, 4):<12} "
-                f"{format_decimal(pos.entry_price, 2):<15} "
-                f"{format_decimal(pos.highest_price_since_entry, 2):<15} "
-                f"{format_decimal(pos.current_stop_trigger or Decimal('0'), 2):<15} "
-                f"{status:<10}"
-            )
+    # Same output as format_decimal() + padding, with the spec parsed once
+    row_fmt = "{:<20} {:<12.4f} {:<15.2f} {:<15.2f} {:<15.2f} {:<10}".format
+    for pos_id, pos in positions.items():
+        lines.append(row_fmt(
+            pos_id,
+            pos.qty_filled,
+            pos.entry_price,
+            pos.highest_price_since_entry,
+            pos.current_stop_trigger or Decimal('0'),
+            "OPEN" if pos.qty_filled > 0 else "CLOSED",
+        ))
+    
+    # One write for the whole table instead of a print() per row
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def show_position(persistence, position_id):
@@ -78,7 +82,8 @@ def show_position(persistence, position_id):
             print(f"{order_id:<20} {order_type:<10} {state:<10} {created:<20}")
 
 
-def main():
+def main(argv=None) -> int:
+    """Run the CLI with ``argv`` (defaults to ``sys.argv[1:]``); returns the exit code."""
     parser = argparse.ArgumentParser(description="Position status CLI")
     parser.add_argument("--db", required=True, help="Path to SQLite database")
     
@@ -88,14 +93,14 @@ def main():
     show = sub.add_parser("show")
     show.add_argument("position_id")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     db_path = Path(args.db)
-    if not db_path.exists():
+    try:
+        persistence = SQLitePersistence(db_path, create=False)
+    except FileNotFoundError:
         print(f"Database not found: {db_path}")
-        sys.exit(1)
-    
-    persistence = SQLitePersistence(db_path)
+        return 1
     
     if args.cmd == "list":
         list_positions(persistence)
@@ -105,7 +110,8 @@ def main():
         parser.print_help()
     
     persistence.close()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
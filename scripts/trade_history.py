@@ -14,29 +14,27 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from trading.persistence_sqlite import SQLitePersistence
-from trading.pnl import Fill, calculate_pnl, aggregate_pnl
+from trading.pnl import Fill, aggregate_pnl, calculate_pnl
 
 
 def get_fills_from_orders(persistence, position_id=None):
     """Extract fills from order records."""
     fills = []
     
-    position_ids = persistence.list_positions()
+    orders_by_position = persistence.list_all_orders()
     
-    for pos_id in position_ids:
+    for pos_id, orders in orders_by_position.items():
         if position_id and pos_id != position_id:
             continue
         
-        orders = persistence.list_orders(position_id=pos_id)
-        
         for order in orders:
             if order.get("state") not in ("filled", "partially_filled"):
                 continue
             
-            # Extract fill info
+            # Extract fill info (orders store numbers as exact strings)
             try:
-                price = Decimal(str(order.get("price", 0)))
-                qty = Decimal(str(order.get("qty", 0)))
+                price = Decimal(order.get("price", "0"))
+                qty = Decimal(order.get("qty", "0"))
                 side = "buy" if order.get("type") == "entry" else "sell"
                 
                 fill = Fill(
@@ -53,6 +51,22 @@ def get_fills_from_orders(persistence, position_id=None):
     return fills
 
 
+def summarize_trades(persistence):
+    """Aggregate P&L over completed trades (each entry with its position's first exit)."""
+    analyses = []
+    for entry_price, entry_qty, exit_price, exit_qty in persistence.trade_pairs():
+        entry_price = Decimal(str(entry_price or 0))
+        entry_qty = Decimal(str(entry_qty or 0))
+        if entry_price > 0 and entry_qty > 0:
+            analyses.append(calculate_pnl(
+                entry_price=entry_price,
+                entry_qty=entry_qty,
+                exit_price=Decimal(str(exit_price)) if exit_price is not None else None,
+                exit_qty=Decimal(str(exit_qty)) if exit_qty is not None else None,
+            ))
+    return aggregate_pnl(analyses)
+
+
 def summary(persistence):
     """Show P&L summary across all positions."""
     position_ids = persistence.list_positions()
@@ -61,44 +75,12 @@ def summary(persistence):
         print("No positions found")
         return
     
-    # Collect all entry and exit fills
-    analyses = []
+    agg = summarize_trades(persistence)
     
-    for pos_id in position_ids:
-        orders = persistence.list_orders(position_id=pos_id)
-        
-        # Find entry and exit fills
-        entries = [o for o in orders if o.get("type") == "entry" and o.get("state") == "filled"]
-        exits = [o for o in orders if o.get("type") in ("exit", "force_sell") and o.get("state") == "filled"]
-        
-        # Calculate P&L for each position
-        for entry in entries:
-            entry_price = Decimal(str(entry.get("price", 0)))
-            entry_qty = Decimal(str(entry.get("qty", 0)))
-            
-            # Find matching exit
-            exit_price = None
-            exit_qty = None
-            for exit_order in exits:
-                exit_price = Decimal(str(exit_order.get("price", 0)))
-                exit_qty = Decimal(str(exit_order.get("qty", 0)))
-                break
-            
-            if entry_price > 0 and entry_qty > 0:
-                analysis = calculate_pnl(
-                    entry_price=entry_price,
-                    entry_qty=entry_qty,
-                    exit_price=exit_price,
-                    exit_qty=exit_qty
-                )
-                analyses.append(analysis)
-    
-    if not analyses:
+    if not agg["total_trades"]:
         print("No completed trades found")
         return
     
-    agg = aggregate_pnl(analyses)
-    
     print("\n=== Trading Summary ===")
     print(f"Total Trades: {agg['total_trades']}")
     print(f"Realized P&L: ${agg['total_realized_pnl']:.2f}")
@@ -118,10 +100,10 @@ def list_trades(persistence):
     
     entry_orders = []
     exit_orders = []
+    orders_by_position = persistence.list_all_orders()
     
     for pos_id in position_ids:
-        orders = persistence.list_orders(position_id=pos_id)
-        for order in orders:
+        for order in orders_by_position.get(pos_id, []):
             if order.get("state") != "filled":
                 continue
             
@@ -134,19 +116,23 @@ def list_trades(persistence):
         print("No trades found")
         return
     
-    print("\n=== Entry Fills ===")
-    print(f"{'Pos ID':<20} {'Order ID':<20} {'Price':<12} {'Qty':<10} {'Time':<20}")
-    print("-" * 82)
+    header = f"{'Pos ID':<20} {'Order ID':<20} {'Price':<12} {'Qty':<10} {'Time':<20}"
+    
+    def fill_row(pos_id, order):
+        return f"{pos_id:<20} {order['order_id']:<20} ${order.get('price', 'N/A'):<11} {order.get('qty', 'N/A'):<10} {order.get('created_at', 'N/A'):<20}"
+    
+    lines = ["\n=== Entry Fills ===", header, "-" * 82]
     for pos_id, order in sorted(entry_orders, key=lambda x: x[1].get("created_at", "")):
-        print(f"{pos_id:<20} {order['order_id']:<20} ${order.get('price', 'N/A'):<11} {order.get('qty', 'N/A'):<10} {order.get('created_at', 'N/A'):<20}")
+        lines.append(fill_row(pos_id, order))
     
-    print("\n=== Exit Fills ===")
-    print(f"{'Pos ID':<20} {'Order ID':<20} {'Price':<12} {'Qty':<10} {'Time':<20}")
-    print("-" * 82)
+    lines += ["\n=== Exit Fills ===", header, "-" * 82]
     for pos_id, order in sorted(exit_orders, key=lambda x: x[1].get("created_at", "")):
-        print(f"{pos_id:<20} {order['order_id']:<20} ${order.get('price', 'N/A'):<11} {order.get('qty', 'N/A'):<10} {order.get('created_at', 'N/A'):<20}")
+        lines.append(fill_row(pos_id, order))
+    
+    lines.append(f"\nTotal entries: {len(entry_orders)}, Total exits: {len(exit_orders)}")
     
-    print(f"\nTotal entries: {len(entry_orders)}, Total exits: {len(exit_orders)}")
+    # One write for the whole report instead of a print() per row
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def position_history(persistence, position_id):
@@ -165,15 +151,24 @@ def position_history(persistence, position_id):
     print(f"Highest Price: ${pos.highest_price_since_entry}")
     print(f"Current Stop: ${pos.current_stop_trigger}")
     
-    # Calculate P&L if we have entry and exit
-    entries = [o for o in orders if o.get("type") == "entry" and o.get("state") == "filled"]
-    exits = [o for o in orders if o.get("type") in ("exit", "force_sell") and o.get("state") == "filled"]
-    
-    if entries and exits:
-        entry_price = Decimal(str(entries[0].get("price", 0)))
-        entry_qty = Decimal(str(entries[0].get("qty", 0)))
-        exit_price = Decimal(str(exits[0].get("price", 0)))
-        exit_qty = Decimal(str(exits[0].get("qty", 0)))
+    # Calculate P&L from the first filled entry and first filled exit (one pass)
+    entry = exit_order = None
+    for o in orders:
+        if o.get("state") != "filled":
+            continue
+        order_type = o.get("type")
+        if order_type == "entry":
+            entry = entry or o
+        elif order_type in ("exit", "force_sell"):
+            exit_order = exit_order or o
+        if entry and exit_order:
+            break
+    
+    if entry and exit_order:
+        entry_price = Decimal(entry.get("price", "0"))
+        entry_qty = Decimal(entry.get("qty", "0"))
+        exit_price = Decimal(exit_order.get("price", "0"))
+        exit_qty = Decimal(exit_order.get("qty", "0"))
         
         if entry_price > 0 and entry_qty > 0:
             analysis = calculate_pnl(
@@ -194,7 +189,8 @@ def position_history(persistence, position_id):
             print(f"{order_id:<20} {order.get('type', 'unknown'):<12} {order.get('state', 'unknown'):<10} {order.get('price', 'N/A'):<12} {order.get('qty', 'N/A'):<10}")
 
 
-def main():
+def main(argv=None) -> int:
+    """Run the CLI with ``argv`` (defaults to ``sys.argv[1:]``); returns the exit code."""
     parser = argparse.ArgumentParser(description="Trade history and P&L reporter")
     parser.add_argument("--db", required=True, help="Path to SQLite database")
     
@@ -206,14 +202,14 @@ def main():
     pos_cmd = sub.add_parser("position")
     pos_cmd.add_argument("position_id")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     db_path = Path(args.db)
-    if not db_path.exists():
+    try:
+        persistence = SQLitePersistence(db_path, create=False)
+    except FileNotFoundError:
         print(f"Database not found: {db_path}")
-        sys.exit(1)
-    
-    persistence = SQLitePersistence(db_path)
+        return 1
     
     if args.cmd == "summary":
         summary(persistence)
@@ -225,7 +221,8 @@ def main():
         parser.print_help()
     
     persistence.close()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
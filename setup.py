@@ -3,13 +3,17 @@ Setup configuration for quant-trade package.
 
 Supports both modern (pyproject.toml) and legacy installations.
 """
+from pathlib import Path
+
 from setuptools import setup, find_packages
 
+long_description = (Path(__file__).parent / "README.md").read_text(encoding="utf-8")
+
 setup(
     name="quant-trade",
     version="0.1.0",
     description="Coinbase Spot Trading Engine with limit entry and dynamic trailing exit",
-    long_description=open("README.md").read(),
+    long_description=long_description,
     long_description_content_type="text/markdown",
     author="Trading System Team",
     license="MIT",
@@ -34,6 +38,7 @@ setup(
             "mypy>=1.0.0,<2.0",
             "isort>=5.12.0,<6.0",
             "pytest-cov>=4.0.0,<5.0",
+            "pytest-xdist>=3.0.0,<4.0",
             "pre-commit>=3.0.0,<4.0",
             "sphinx>=6.0.0,<8.0",
             "sphinx-rtd-theme>=1.2.0,<2.0",
@@ -44,6 +49,10 @@ setup(
         "encryption": [
             "sqlcipher3-binary>=0.6.0,<1.0",
         ],
+        "performance": [
+            "uvloop>=0.17.0,<1.0; platform_system != 'Windows'",
+            "orjson>=3.9.0,<4.0",
+        ],
     },
     classifiers=[
         "Development Status :: 4 - Beta",
@@ -1,4 +1,10 @@
 import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import random
+import types
 from decimal import Decimal
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -30,6 +36,14 @@ async def test_jittered_backoff_is_positive():
         assert backoff >= 0
 
 
+def test_jittered_backoff_uses_given_rng_and_large_attempts():
+    """Verify jitter comes from the supplied generator and huge attempts stay capped."""
+    draw = random.Random(7).random()
+    backoff = AsyncCoinbaseAdapter._jittered_backoff(1, base=1.0, max_backoff=60.0, rng=random.Random(7))
+    assert backoff == pytest.approx(2.0 * (1 + 0.25 * (2 * draw - 1)))
+    assert AsyncCoinbaseAdapter._jittered_backoff(10_000, base=1.0, max_backoff=5.0) <= 5.0 * 1.25
+
+
 @pytest.mark.asyncio
 async def test_get_rate_limit_reset_extracts_header():
     """Verify extraction of CB-RateLimit-Reset header."""
@@ -46,6 +60,38 @@ async def test_get_rate_limit_reset_returns_none_if_absent():
     assert reset_ts is None
 
 
+def test_signing_key_is_decoded_once():
+    """Verify the base64 secret is decoded at construction, and bad secrets fail fast."""
+    from trading.async_coinbase_adapter import AsyncCoinbaseAPIError
+    adapter = AsyncCoinbaseAdapter(api_key="test", secret="dGVzdA==")
+    assert adapter._hmac_key == b"test"
+    with pytest.raises(AsyncCoinbaseAPIError, match="base64"):
+        AsyncCoinbaseAdapter(api_key="test", secret="not base64!")
+
+
+@pytest.mark.parametrize("method, body", [("POST", b'{"size":"0.1"}'), ("delete", None), ("GET", b"")])
+def test_sign_matches_prehash_string(method, body):
+    """Verify the incremental signature equals HMAC(timestamp + METHOD + path + body)."""
+    adapter = AsyncCoinbaseAdapter(api_key="test", secret="dGVzdA==")
+    headers = adapter._sign(method, "/orders", body)
+    message = (headers["CB-ACCESS-TIMESTAMP"] + method.upper() + "/orders").encode() + (body or b"")
+    expected = base64.b64encode(hmac.new(b"test", message, hashlib.sha256).digest()).decode()
+    assert headers["CB-ACCESS-SIGN"] == expected
+
+
+def test_sign_builds_headers_from_template():
+    """Verify each call gets its own copy of the static headers plus sign/timestamp."""
+    adapter = AsyncCoinbaseAdapter(api_key="key", secret="dGVzdA==", passphrase="pass")
+    first = adapter._sign("GET", "/orders", None)
+    second = adapter._sign("GET", "/orders", None)
+    assert first is not second
+    assert first["CB-ACCESS-KEY"] == "key"
+    assert first["CB-ACCESS-PASSPHRASE"] == "pass"
+    assert set(first) == {"CB-ACCESS-KEY", "CB-ACCESS-PASSPHRASE", "Content-Type", "CB-ACCESS-SIGN", "CB-ACCESS-TIMESTAMP"}
+    assert "CB-ACCESS-SIGN" not in adapter._headers_base
+    assert "CB-ACCESS-PASSPHRASE" not in AsyncCoinbaseAdapter(api_key="key", secret="dGVzdA==")._sign("GET", "/orders", None)
+
+
 @pytest.mark.asyncio
 async def test_context_manager_initializes_session():
     """Verify async context manager sets up session."""
@@ -56,6 +102,14 @@ async def test_context_manager_initializes_session():
     assert adapter.session.closed
 
 
+@pytest.mark.asyncio
+async def test_session_uses_tuned_connector_and_timeout():
+    """Verify the session pools connections to the one host and carries the request timeout."""
+    async with AsyncCoinbaseAdapter(api_key="test", secret="dGVzdA==", timeout=7) as adapter:
+        assert adapter.session.connector.limit_per_host == 16
+        assert adapter.session.timeout.total == 7
+
+
 @pytest.mark.asyncio
 async def test_request_without_session_raises():
     """Verify request raises if session not initialized."""
@@ -127,3 +181,83 @@ async def test_cancel_order_returns_false_on_error():
     adapter = AsyncCoinbaseAdapter(api_key="test", secret="dGVzdA==", passphrase="test")
     assert asyncio.iscoroutinefunction(adapter.place_stop_limit)
 
+
+
+@pytest.fixture
+async def coinbase_server():
+    """Local aiohttp server answering /orders from ``server.responses`` in order.
+
+    Each response is ``(status, headers, json_body)``; the timestamps of the
+    signed requests are collected in ``server.timestamps``.
+    """
+    from aiohttp import web
+
+    server = types.SimpleNamespace(responses=[], timestamps=[], url=None)
+
+    async def handler(request):
+        assert json.loads(await request.read()) == {"size": "1"}
+        server.timestamps.append(request.headers["CB-ACCESS-TIMESTAMP"])
+        status, headers, body = server.responses.pop(0)
+        return web.json_response(body, status=status, headers=headers)
+
+    app = web.Application()
+    app.router.add_route("*", "/orders", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    server.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    yield server
+    await runner.cleanup()
+
+
+@pytest.fixture
+def recorded_sleeps(monkeypatch):
+    """Record the adapter's backoff sleeps without actually waiting."""
+    sleeps = []
+    real_sleep = asyncio.sleep
+
+    def fake_sleep(delay):
+        if delay > 0:  # aiohttp itself may sleep(0)
+            sleeps.append(delay)
+        return real_sleep(0)
+
+    monkeypatch.setattr("trading.async_coinbase_adapter.asyncio.sleep", fake_sleep)
+    return sleeps
+
+
+@pytest.mark.asyncio
+async def test_request_retries_429_in_a_loop(coinbase_server, recorded_sleeps):
+    """Verify 429 responses are retried (re-signed each time) until the request succeeds."""
+    coinbase_server.responses = [(429, {}, {"message": "slow down"})] * 2 + [(200, {}, {"id": "o1"})]
+    async with AsyncCoinbaseAdapter(api_key="test", secret="dGVzdA==", base_url=coinbase_server.url) as adapter:
+        assert await adapter._request("POST", "/orders", body={"size": "1"}) == {"id": "o1"}
+
+    assert not coinbase_server.responses
+    assert len(recorded_sleeps) == 2
+    assert len(coinbase_server.timestamps) == 3
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_reset_wait_is_clamped(coinbase_server, recorded_sleeps):
+    """Verify a far-future CB-RateLimit-Reset waits at most max_backoff_seconds."""
+    import time
+    reset = {"CB-RateLimit-Reset": str(time.time() + 3600)}
+    coinbase_server.responses = [(429, reset, {}), (200, {}, {"id": "o1"})]
+    async with AsyncCoinbaseAdapter(api_key="test", secret="dGVzdA==", base_url=coinbase_server.url, max_backoff_seconds=0.5) as adapter:
+        assert await adapter._request("POST", "/orders", body={"size": "1"}) == {"id": "o1"}
+
+    assert recorded_sleeps == [0.5]
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_reset_retries_are_capped(coinbase_server, recorded_sleeps):
+    """Verify a server that keeps sending future reset times is given up on."""
+    import time
+    reset = {"CB-RateLimit-Reset": str(time.time() + 3600)}
+    coinbase_server.responses = [(429, reset, {})] * 6
+    async with AsyncCoinbaseAdapter(api_key="test", secret="dGVzdA==", base_url=coinbase_server.url, max_backoff_seconds=0.5) as adapter:
+        with pytest.raises(AsyncRateLimitError):
+            await adapter._request("POST", "/orders", body={"size": "1"})
+
+    assert len(recorded_sleeps) == 5
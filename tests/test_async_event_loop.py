@@ -1,5 +1,6 @@
 """Test async event loop integration with mock engine."""
 import asyncio
+import sys
 from decimal import Decimal
 
 import pytest
@@ -48,16 +49,68 @@ async def test_event_loop_runs_without_error():
     assert len(engine.trade_prices) >= 2
 
 
+@pytest.mark.asyncio
+async def test_stop_ends_start_promptly():
+    """stop() cancels the sleeping loops, so start() returns right away."""
+    engine = MockAsyncEngine()
+    runner = EventLoopRunner(
+        engine=engine,
+        reconciler=PeriodicReconciler(interval_seconds=30.0),
+        trade_listener=MockTradeListener(interval_seconds=30.0),
+    )
+    
+    task = asyncio.create_task(runner.start())
+    await asyncio.sleep(0.05)
+    await runner.stop()
+    
+    await asyncio.wait_for(task, timeout=0.5)
+    assert engine.reconcile_count >= 1
+
+
+class FailingAsyncEngine(MockAsyncEngine):
+    async def on_trade(self, last_trade_price: Decimal):
+        raise RuntimeError("engine failed")
+
+
+@pytest.mark.asyncio
+async def test_failing_loop_cancels_the_others():
+    """An error in one loop ends start() instead of leaving the rest running."""
+    runner = EventLoopRunner(engine=FailingAsyncEngine(), trade_listener=MockTradeListener(interval_seconds=0))
+    
+    # TaskGroup (3.11+) reports child failures as an ExceptionGroup
+    expected = ExceptionGroup if sys.version_info >= (3, 11) else RuntimeError  # noqa: F821
+    with pytest.raises(expected):
+        await asyncio.wait_for(runner.start(), timeout=0.5)
+
+
+class BurstTradeListener:
+    """Delivers all its prices at once, faster than the engine handles them."""
+    
+    def __init__(self, prices):
+        self.prices = [Decimal(p) for p in prices]
+    
+    async def stream_trades(self):
+        for price in self.prices:
+            yield price
+
+
+@pytest.mark.asyncio
+async def test_trade_burst_is_coalesced_to_its_highest_price():
+    """Ticks queued while the engine is busy reach it as one update at their maximum."""
+    engine = MockAsyncEngine()
+    runner = EventLoopRunner(engine=engine, trade_listener=BurstTradeListener([100, 105, 103, 101, 104]))
+    
+    await asyncio.wait_for(runner._trade_listener_loop(), timeout=1.0)
+    
+    assert engine.trade_prices == [Decimal('105')]
+
+
 @pytest.mark.asyncio
 async def test_mock_trade_listener_generates_prices():
     """Trade listener should generate price updates."""
-    listener = MockTradeListener(interval_seconds=0.01, initial_price=Decimal('100'))
+    listener = MockTradeListener(interval_seconds=0, initial_price=Decimal('100'), pregenerate=5)
     
-    prices = []
-    async for price in listener.stream_trades():
-        prices.append(price)
-        if len(prices) >= 5:
-            break
+    prices = [price async for price in listener.stream_trades()]
     
     assert len(prices) == 5
     # Prices should vary (not all the same)
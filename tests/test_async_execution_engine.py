@@ -1,14 +1,23 @@
 import asyncio
+from dataclasses import dataclass, field
 from decimal import Decimal
+from typing import Dict
+
 import pytest
 
 from trading.async_execution import AsyncExecutionEngine
 from trading.execution import FilePersistence
 
 
+@dataclass
 class AsyncInMemoryAdapter:
-    def __init__(self):
-        self.orders = {}
+    orders: Dict[str, dict] = field(default_factory=dict)
+    stops: Dict[str, dict] = field(default_factory=dict)  # open stop orders, indexed by id
+    next_id: int = 1
+
+    def reset(self):
+        self.orders.clear()
+        self.stops.clear()
         self.next_id = 1
 
     def _gen(self):
@@ -23,12 +32,14 @@ class AsyncInMemoryAdapter:
 
     async def place_stop_limit(self, client_id: str, trigger: Decimal, limit: Decimal, qty: Decimal):
         oid = self._gen()
-        self.orders[oid] = {"type": "stop_limit", "trigger": str(trigger), "limit": str(limit), "qty": str(qty), "state": "open"}
+        order = {"type": "stop_limit", "trigger": str(trigger), "limit": str(limit), "qty": str(qty), "state": "open"}
+        self.orders[oid] = self.stops[oid] = order
         return oid
 
     async def cancel_order(self, order_id: str):
         if order_id in self.orders:
             self.orders[order_id]["state"] = "cancelled"
+            self.stops.pop(order_id, None)
             return True
         return False
 
@@ -36,11 +47,34 @@ class AsyncInMemoryAdapter:
         return self.orders.get(order_id)
 
 
-@pytest.mark.asyncio
-async def test_async_engine_places_initial_stop(tmp_path):
+@pytest.fixture(scope="module")
+def loop():
+    """One event loop for the module, driven with run_until_complete.
+
+    (asyncio.Runner would do the same but needs Python 3.11; we support 3.9.)
+    """
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="module")
+def adapter():
+    return AsyncInMemoryAdapter()
+
+
+@pytest.fixture(autouse=True)
+def _reset_adapter(adapter):
+    adapter.reset()
+
+
+def test_async_engine_places_initial_stop(tmp_path, loop, adapter):
+    loop.run_until_complete(_places_initial_stop(tmp_path, adapter))
+
+
+async def _places_initial_stop(tmp_path, adapter):
     db = tmp_path / "pos.json"
     persistence = FilePersistence(db)
-    adapter = AsyncInMemoryAdapter()
     engine = AsyncExecutionEngine(adapter=adapter, persistence=persistence)
 
     await engine.startup_reconcile()
@@ -49,10 +83,8 @@ async def test_async_engine_places_initial_stop(tmp_path):
     # simulate a fill
     await engine.handle_fill(order_id=oid, filled_qty=Decimal('0.1'), fill_price=Decimal('100.0'))
 
-    # ensure a stop was placed
-    # there should be at least one stop order in adapter.orders
-    stops = [o for o in adapter.orders.values() if o.get('type') == 'stop_limit']
-    assert len(stops) == 1
+    # ensure exactly one stop was placed
+    assert len(adapter.stops) == 1
 
     # persistence should contain position with stop_order_id
     pos = persistence.load_position()
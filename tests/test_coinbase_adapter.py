@@ -1,187 +1,223 @@
+import json
+import threading
 import time
 from decimal import Decimal
-from unittest.mock import MagicMock, patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
 
 import pytest
 
-from trading.coinbase_adapter import CoinbaseAdapter, RateLimitError
-
-
-def test_jittered_backoff_increases_with_attempt():
-    """Verify backoff increases exponentially with attempt."""
-    backoff_0 = CoinbaseAdapter._jittered_backoff(0, base=1.0, max_backoff=60.0)
-    backoff_2 = CoinbaseAdapter._jittered_backoff(2, base=1.0, max_backoff=60.0)
-    assert backoff_2 > backoff_0
-
-
-def test_jittered_backoff_respects_max():
-    """Verify backoff is capped at max_backoff."""
-    backoff = CoinbaseAdapter._jittered_backoff(10, base=1.0, max_backoff=5.0)
-    assert backoff <= 5.0 + 5.0 * 0.25  # max + max jitter
-
-
-def test_jittered_backoff_is_positive():
-    """Verify backoff is always non-negative."""
-    for attempt in range(5):
-        backoff = CoinbaseAdapter._jittered_backoff(attempt, base=1.0, max_backoff=10.0)
-        assert backoff >= 0
+from trading.coinbase_adapter import CoinbaseAdapter, CoinbaseAPIError, RateLimitError
+
+
+class _CannedHandler(BaseHTTPRequestHandler):
+    """Serve queued (status, headers, body) responses and record each request."""
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode() if length else ""
+        server = self.server
+        server.requests.append((self.command, self.path, dict(self.headers), body))
+        # The last canned response repeats once the queue is drained
+        status, headers, payload = server.responses.pop(0) if len(server.responses) > 1 else server.responses[0]
+        data = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_DELETE = do_PUT = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def _loopback():
+    """A loopback HTTP server on 127.0.0.1:0, started once for the module."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CannedHandler)
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    # a short poll interval keeps shutdown() from stalling teardown
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def coinbase_server(_loopback):
+    """The loopback server with a clean request log; set ``responses`` before requesting."""
+    _loopback.responses = [(200, {}, None)]
+    _loopback.requests = []
+    return _loopback
+
+
+@pytest.fixture(scope="module")
+def adapter(_loopback):
+    """One adapter (and requests.Session) shared by the module, pointed at the loopback."""
+    return CoinbaseAdapter(api_key="test", secret="dGVzdA==", base_url=_loopback.base_url)
+
+
+def _resp(status, headers=None, body=None):
+    """A bare stand-in for requests.Response carrying only what the adapter reads."""
+    text = json.dumps(body) if body is not None else ""
+    return SimpleNamespace(status_code=status, ok=status < 400, headers=headers or {}, text=text, json=lambda: body)
+
+
+@pytest.mark.parametrize(
+    "attempt, base, max_backoff",
+    [(0, 1.0, 60.0), (2, 1.0, 60.0), (4, 0.5, 10.0), (10, 1.0, 5.0)],
+)
+def test_jittered_backoff_bounds(attempt, base, max_backoff):
+    """Verify backoff stays within ±25% of the capped exponential delay."""
+    delay = min(base * 2 ** attempt, max_backoff)
+    backoff = CoinbaseAdapter._jittered_backoff(attempt, base=base, max_backoff=max_backoff)
+    assert 0 <= delay * 0.75 <= backoff <= delay * 1.25
+    # exponential growth outpaces the jitter until the cap kicks in
+    if delay * 2 <= max_backoff:
+        assert backoff < CoinbaseAdapter._jittered_backoff(attempt + 2, base=base, max_backoff=max_backoff)
+
+
+@pytest.fixture
+def recorded_sleeps(monkeypatch):
+    """Replace the adapter's time.sleep with a recorder so backoff costs no wall time."""
+    recorded = []
+    monkeypatch.setattr("trading.coinbase_adapter.time.sleep", recorded.append)
+    return recorded
 
 
 def test_get_rate_limit_reset_extracts_header():
     """Verify extraction of CB-RateLimit-Reset header."""
-    resp = MagicMock()
-    resp.headers = {"CB-RateLimit-Reset": "1234567890.5"}
+    resp = _resp(429, headers={"CB-RateLimit-Reset": "1234567890.5"})
     reset_ts = CoinbaseAdapter._get_rate_limit_reset(resp)
     assert reset_ts == 1234567890.5
 
 
 def test_get_rate_limit_reset_returns_none_if_absent():
     """Verify None is returned if header is missing."""
-    resp = MagicMock()
-    resp.headers = {}
+    resp = _resp(429)
     reset_ts = CoinbaseAdapter._get_rate_limit_reset(resp)
     assert reset_ts is None
 
 
-@patch("trading.coinbase_adapter.requests.Session.request")
-def test_rate_limit_backoff_with_reset_header(mock_request):
+def test_rate_limit_backoff_with_reset_header(coinbase_server, adapter, recorded_sleeps):
     """Verify adapter sleeps until reset time when rate limited."""
-    adapter = CoinbaseAdapter(api_key="test", secret="dGVzdA==", passphrase="test", max_backoff_seconds=60.0)
-
-    now = time.time()
-    reset_ts = now + 0.1  # reset in 100ms
+    reset_ts = time.time() + 0.1  # reset in 100ms
+    coinbase_server.responses = [
+        (429, {"CB-RateLimit-Reset": str(reset_ts)}, {"message": "Rate limited"}),
+        (200, {}, {"id": "order1"}),
+    ]
 
-    # Mock: first call returns 429 with reset header, second call succeeds
-    rate_limit_resp = MagicMock()
-    rate_limit_resp.status_code = 429
-    rate_limit_resp.ok = False
-    rate_limit_resp.headers = {"CB-RateLimit-Reset": str(reset_ts)}
-    rate_limit_resp.text = "Rate limited"
-
-    success_resp = MagicMock()
-    success_resp.status_code = 200
-    success_resp.ok = True
-    success_resp.text = '{"id": "order1"}'
-    success_resp.json.return_value = {"id": "order1"}
-
-    mock_request.side_effect = [rate_limit_resp, success_resp]
-
-    start = time.time()
     result = adapter._request("POST", "/orders", body={"test": "body"})
-    elapsed = time.time() - start
 
     assert result == {"id": "order1"}
-    assert elapsed >= 0.1  # should have slept at least 100ms
+    assert len(recorded_sleeps) == 1
+    assert 0 < recorded_sleeps[0] <= 0.1 + 0.01  # until the reset, plus epsilon
+    assert len(coinbase_server.requests) == 2
 
 
-@patch("trading.coinbase_adapter.requests.Session.request")
-def test_rate_limit_backoff_without_reset_header_uses_jitter(mock_request):
-    """Verify adapter uses jittered backoff if reset header is absent."""
-    adapter = CoinbaseAdapter(api_key="test", secret="dGVzdA==", passphrase="test", max_backoff_seconds=1.0)
+def test_429_is_left_to_request_not_urllib3(coinbase_server, recorded_sleeps):
+    """Verify a fresh adapter's session passes 429 through so CB-RateLimit-Reset is honoured."""
+    fresh = CoinbaseAdapter(api_key="test", secret="dGVzdA==", base_url=coinbase_server.base_url)
+    for prefix in ("https://", "http://"):
+        assert 429 not in fresh.session.get_adapter(prefix).max_retries.status_forcelist
+    coinbase_server.responses = [
+        (429, {"CB-RateLimit-Reset": str(time.time() + 0.1)}, {"message": "Rate limited"}),
+        (200, {}, {"id": "order3"}),
+    ]
 
-    # Mock: first call returns 429 without reset header, second call succeeds
-    rate_limit_resp = MagicMock()
-    rate_limit_resp.status_code = 429
-    rate_limit_resp.ok = False
-    rate_limit_resp.headers = {}
-    rate_limit_resp.text = "Rate limited"
+    assert fresh._request("GET", "/orders/order3") == {"id": "order3"}
+    assert len(coinbase_server.requests) == 2
+    assert len(recorded_sleeps) == 1
+    assert 0 < recorded_sleeps[0] <= 0.1 + 0.01
 
-    success_resp = MagicMock()
-    success_resp.status_code = 200
-    success_resp.ok = True
-    success_resp.text = '{"id": "order2"}'
-    success_resp.json.return_value = {"id": "order2"}
 
-    mock_request.side_effect = [rate_limit_resp, success_resp]
+def test_rate_limit_backoff_without_reset_header_uses_jitter(coinbase_server, adapter, recorded_sleeps, monkeypatch):
+    """Verify adapter uses jittered backoff if reset header is absent."""
+    monkeypatch.setattr(adapter, "max_backoff_seconds", 1.0)
+    coinbase_server.responses = [
+        (429, {}, {"message": "Rate limited"}),
+        (200, {}, {"id": "order2"}),
+    ]
 
-    start = time.time()
     result = adapter._request("POST", "/orders", body={"test": "body"})
-    elapsed = time.time() - start
 
     assert result == {"id": "order2"}
-    # should have slept for jittered backoff (attempt=0 -> base 2^0 = 1.0, but capped at max_backoff)
-    # with jitter, could be anywhere from 0.75 to 1.25 seconds; we'll just verify it's nonzero and reasonable
-    assert elapsed > 0.1  # at least some backoff
+    # attempt=0 -> base 2^0 = 1.0 capped at max_backoff, with ±25% jitter
+    assert len(recorded_sleeps) == 1
+    assert 0.75 <= recorded_sleeps[0] <= 1.25
 
 
-@patch("trading.coinbase_adapter.requests.Session.request")
-def test_rate_limit_raises_after_max_attempts(mock_request):
+def test_rate_limit_raises_after_max_attempts(coinbase_server, adapter, recorded_sleeps, monkeypatch):
     """Verify RateLimitError is raised if rate limit is not lifted after max backoff attempts."""
-    adapter = CoinbaseAdapter(api_key="test", secret="dGVzdA==", passphrase="test", max_backoff_seconds=0.01)
-
-    rate_limit_resp = MagicMock()
-    rate_limit_resp.status_code = 429
-    rate_limit_resp.ok = False
-    rate_limit_resp.headers = {}
-    rate_limit_resp.text = "Rate limited"
-
-    mock_request.return_value = rate_limit_resp
+    monkeypatch.setattr(adapter, "max_backoff_seconds", 0.01)
+    coinbase_server.responses = [(429, {}, {"message": "Rate limited"})]
 
     with pytest.raises(RateLimitError):
         adapter._request("POST", "/orders", body={"test": "body"})
+    assert len(coinbase_server.requests) == 6
+    assert len(recorded_sleeps) == 5
 
 
-@patch("trading.coinbase_adapter.requests.Session.request")
-def test_normal_errors_still_raised(mock_request):
+def test_normal_errors_still_raised(coinbase_server, adapter):
     """Verify non-429 errors are raised immediately."""
-    adapter = CoinbaseAdapter(api_key="test", secret="dGVzdA==", passphrase="test")
+    coinbase_server.responses = [(400, {}, {"message": "Bad request"})]
 
-    error_resp = MagicMock()
-    error_resp.status_code = 400
-    error_resp.ok = False
-    error_resp.text = "Bad request"
-
-    mock_request.return_value = error_resp
-
-    from trading.coinbase_adapter import CoinbaseAPIError
     with pytest.raises(CoinbaseAPIError, match="400"):
         adapter._request("POST", "/orders", body={"test": "body"})
+    assert len(coinbase_server.requests) == 1
 
 
-@patch("trading.coinbase_adapter.requests.Session.request")
-def test_place_limit_buy_calls_request(mock_request):
-    """Verify place_limit_buy constructs correct request and calls _request."""
-    adapter = CoinbaseAdapter(api_key="test", secret="dGVzdA==", passphrase="test", product_id="BTC-USD")
+def test_request_is_signed_and_serialized(coinbase_server, adapter):
+    """Verify the wire request carries the signing headers and the JSON body."""
+    coinbase_server.responses = [(200, {}, {"id": "o1"})]
+
+    adapter._request("POST", "/orders", body={"test": "body"})
 
-    success_resp = MagicMock()
-    success_resp.status_code = 200
-    success_resp.ok = True
-    success_resp.text = '{"id": "o123"}'
-    success_resp.json.return_value = {"id": "o123"}
+    method, path, headers, body = coinbase_server.requests[0]
+    assert (method, path) == ("POST", "/orders")
+    assert json.loads(body) == {"test": "body"}
+    assert headers["CB-ACCESS-KEY"] == "test"
+    assert headers["CB-ACCESS-SIGN"]
+    assert headers["CB-ACCESS-TIMESTAMP"]
 
-    mock_request.return_value = success_resp
+
+def test_signing_key_is_decoded_once(adapter):
+    """Verify the base64 secret is decoded at construction, and bad secrets fail fast."""
+    assert adapter._hmac_key == b"test"
+    with pytest.raises(CoinbaseAPIError, match="base64"):
+        CoinbaseAdapter(api_key="test", secret="not base64!")
+
+
+def test_place_limit_buy_calls_request(coinbase_server, adapter):
+    """Verify place_limit_buy constructs correct request and calls _request."""
+    coinbase_server.responses = [(200, {}, {"id": "o123"})]
 
     order_id = adapter.place_limit_buy(client_id="c1", price=Decimal("50000"), qty=Decimal("0.1"))
     assert order_id == "o123"
 
+    body = json.loads(coinbase_server.requests[0][3])
+    assert body["product_id"] == "BTC-USD"
+    assert body["price"] == "50000"
+    assert body["size"] == "0.1"
 
-@patch("trading.coinbase_adapter.requests.Session.request")
-def test_cancel_order_returns_true_on_success(mock_request):
-    """Verify cancel_order returns True on successful cancellation."""
-    adapter = CoinbaseAdapter(api_key="test", secret="dGVzdA==", passphrase="test")
-
-    success_resp = MagicMock()
-    success_resp.status_code = 200
-    success_resp.ok = True
-    success_resp.text = ""
 
-    mock_request.return_value = success_resp
+def test_cancel_order_returns_true_on_success(coinbase_server, adapter):
+    """Verify cancel_order returns True on successful cancellation."""
+    coinbase_server.responses = [(200, {}, None)]
 
     result = adapter.cancel_order("o123")
     assert result is True
+    assert coinbase_server.requests[0][:2] == ("DELETE", "/orders/o123")
 
 
-@patch("trading.coinbase_adapter.requests.Session.request")
-def test_cancel_order_returns_false_on_error(mock_request):
+def test_cancel_order_returns_false_on_error(coinbase_server, adapter):
     """Verify cancel_order returns False on error."""
-    adapter = CoinbaseAdapter(api_key="test", secret="dGVzdA==", passphrase="test")
-
-    error_resp = MagicMock()
-    error_resp.status_code = 404
-    error_resp.ok = False
-    error_resp.text = "Not found"
-
-    mock_request.return_value = error_resp
+    coinbase_server.responses = [(404, {}, {"message": "Not found"})]
 
     result = adapter.cancel_order("invalid_id")
     assert result is False
@@ -1,13 +1,10 @@
-from pathlib import Path
-
 from trading.db_migrations import apply_migrations, MIGRATIONS
 from trading.persistence_sqlite import SQLitePersistence
 
 
-def test_apply_migrations_idempotent(tmp_path: Path):
-    db = tmp_path / "migs.db"
-    # create connection via persistence to ensure file exists
-    p = SQLitePersistence(db)
+def test_apply_migrations_idempotent():
+    # persistence applies migrations on open; no durability needed, so stay in memory
+    p = SQLitePersistence(":memory:")
     # apply migrations again directly
     applied = apply_migrations(p.conn)
     # initial migrations may already be applied; reapplying should return []
@@ -1,23 +1,18 @@
-import os
 from decimal import Decimal
-from pathlib import Path
-
-from trading.execution import InMemoryAdapter, FilePersistence, ExecutionEngine
 
+import pytest
 
-STATE_FILE = Path(".test_state.json")
+from trading.execution import InMemoryAdapter, FilePersistence, ExecutionEngine
 
 
-def teardown_function():
-    try:
-        STATE_FILE.unlink()
-    except FileNotFoundError:
-        pass
+@pytest.fixture
+def state_file(tmp_path):
+    return tmp_path / "state.json"
 
 
-def test_full_flow_place_fill_persist_and_stop():
+def test_full_flow_place_fill_persist_and_stop(state_file):
     adapter = InMemoryAdapter()
-    persistence = FilePersistence(STATE_FILE)
+    persistence = FilePersistence(state_file)
     engine = ExecutionEngine(adapter=adapter, persistence=persistence)
 
     oid = engine.submit_entry(client_id="c1", price=Decimal('100'), qty=Decimal('1'))
@@ -26,7 +21,7 @@ def test_full_flow_place_fill_persist_and_stop():
     engine.handle_fill(order_id=oid, filled_qty=Decimal('1'), fill_price=Decimal('100'))
 
     # position persisted
-    assert STATE_FILE.exists()
+    assert state_file.exists()
 
     # initial stop should have been placed in adapter and persisted
     pos = engine.osm.position
@@ -34,9 +29,9 @@ def test_full_flow_place_fill_persist_and_stop():
     assert pos.stop_order_id in adapter.orders
 
 
-def test_on_trade_ratcheting_replaces_stop():
+def test_on_trade_ratcheting_replaces_stop(state_file):
     adapter = InMemoryAdapter()
-    persistence = FilePersistence(STATE_FILE)
+    persistence = FilePersistence(state_file)
     engine = ExecutionEngine(adapter=adapter, persistence=persistence)
 
     oid = engine.submit_entry(client_id="c2", price=Decimal('10'), qty=Decimal('1'))
@@ -49,9 +44,9 @@ def test_on_trade_ratcheting_replaces_stop():
     assert adapter.orders[old_stop]['state'] == 'cancelled'
 
 
-def test_handle_stop_timeout_replaces_stop_and_persists():
+def test_handle_stop_timeout_replaces_stop_and_persists(state_file):
     adapter = InMemoryAdapter()
-    persistence = FilePersistence(STATE_FILE)
+    persistence = FilePersistence(state_file)
     engine = ExecutionEngine(adapter=adapter, persistence=persistence)
 
     oid = engine.submit_entry(client_id="c3", price=Decimal('20'), qty=Decimal('2'))
@@ -63,4 +58,4 @@ def test_handle_stop_timeout_replaces_stop_and_persists():
     assert new_stop != prev_stop
     assert adapter.orders[prev_stop]['state'] == 'cancelled'
     # verify persisted file updated
-    assert STATE_FILE.exists()
+    assert state_file.exists()
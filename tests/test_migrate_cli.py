@@ -1,18 +1,30 @@
+import io
 import sqlite3
-from pathlib import Path
 import subprocess
 import sys
+from pathlib import Path
+
+import pytest
 
+from scripts.migrate import main
 from trading.db_migrations import MIGRATIONS
 
 
-def run_cli(db_path, args):
-    cmd = [sys.executable, "scripts/migrate.py", "--db", str(db_path)] + args
-    res = subprocess.run(cmd, capture_output=True, text=True)
-    return res.returncode, res.stdout, res.stderr
+@pytest.fixture
+def run_cli(capsys, monkeypatch):
+    """Call the migrate CLI in-process; returns (exit code, stdout, stderr)."""
+    # Empty stdin makes confirmation prompts hit EOF, as a piped subprocess would
+    monkeypatch.setattr("sys.stdin", io.StringIO(""))
+
+    def run(db_path, args):
+        code = main(["--db", str(db_path)] + args)
+        out, err = capsys.readouterr()
+        return code, out, err
+
+    return run
 
 
-def test_cli_apply_and_list(tmp_path: Path):
+def test_cli_apply_and_list(tmp_path: Path, run_cli):
     db = tmp_path / "cli.db"
     code, out, err = run_cli(db, ["apply"])
     assert code == 0
@@ -23,7 +35,7 @@ def test_cli_apply_and_list(tmp_path: Path):
     assert "Available migrations:" in out
 
 
-def test_cli_rollback_last(tmp_path: Path):
+def test_cli_rollback_last(tmp_path: Path, run_cli):
     db = tmp_path / "cli2.db"
     # ensure applied
     run_cli(db, ["apply"])
@@ -32,7 +44,7 @@ def test_cli_rollback_last(tmp_path: Path):
     assert "Rolled back migration" in out or "No applied migrations" in out
 
 
-def test_cli_apply_dry_run(tmp_path: Path):
+def test_cli_apply_dry_run(tmp_path: Path, run_cli):
     db = tmp_path / "cli3.db"
     # before apply: should show v1 as pending
     code, out, err = run_cli(db, ["apply", "--dry-run"])
@@ -49,7 +61,7 @@ def test_cli_apply_dry_run(tmp_path: Path):
     assert "No pending migrations" in out
 
 
-def test_cli_rollback_dry_run(tmp_path: Path):
+def test_cli_rollback_dry_run(tmp_path: Path, run_cli):
     db = tmp_path / "cli4.db"
     # apply migrations first
     run_cli(db, ["apply"])
@@ -64,7 +76,7 @@ def test_cli_rollback_dry_run(tmp_path: Path):
     assert "applied" in out
 
 
-def test_cli_rollback_with_yes_flag(tmp_path: Path):
+def test_cli_rollback_with_yes_flag(tmp_path: Path, run_cli):
     db = tmp_path / "cli5.db"
     run_cli(db, ["apply"])
     # rollback with --yes should not prompt
@@ -72,3 +84,25 @@ def test_cli_rollback_with_yes_flag(tmp_path: Path):
     assert code == 0
     assert "Rolled back migration" in out
     assert "Are you sure" not in out
+
+
+def test_cli_apply_is_noop_when_up_to_date(tmp_path: Path, run_cli):
+    db = tmp_path / "cli4.db"
+    run_cli(db, ["apply"])
+    code, out, err = run_cli(db, ["apply"])
+    assert code == 0
+    assert "No migrations applied" in out
+
+    code, out, err = run_cli(db, ["apply", "--dry-run"])
+    assert code == 0
+    assert "No pending migrations" in out
+
+
+@pytest.mark.slow
+def test_cli_runs_as_script(tmp_path: Path):
+    """Smoke-test the real `python scripts/migrate.py` entry point in a subprocess."""
+    db = tmp_path / "script.db"
+    script = Path(__file__).resolve().parents[1] / "scripts" / "migrate.py"
+    res = subprocess.run([sys.executable, str(script), "--db", str(db), "apply"], capture_output=True, text=True)
+    assert res.returncode == 0, res.stderr
+    assert "Applied migrations" in res.stdout
@@ -1,14 +1,22 @@
 """Test migration chains: apply and rollback multiple versions."""
 import sqlite3
-from pathlib import Path
+
+import pytest
 
 from trading.db_migrations import MIGRATIONS, apply_migrations, rollback_last, rollback_migration
 
 
-def test_migration_chain_v1_v2_apply(tmp_path: Path):
+@pytest.fixture
+def mem_db():
+    """A fresh in-memory connection; these tests exercise schema, not durability."""
+    conn = sqlite3.connect(":memory:")
+    yield conn
+    conn.close()
+
+
+def test_migration_chain_v1_v2_apply(mem_db):
     """Apply v1 then v2, verify both are applied."""
-    db = tmp_path / "chain.db"
-    conn = sqlite3.connect(str(db), timeout=30)
+    conn = mem_db
     
     # Apply all migrations
     applied = apply_migrations(conn)
@@ -29,14 +37,12 @@ def test_migration_chain_v1_v2_apply(tmp_path: Path):
     assert "idx_positions_id" in indices
     assert "idx_orders_position_id" in indices
     assert "idx_orders_state" in indices
-    
-    conn.close()
+    assert "idx_orders_pos_state_type" in indices
 
 
-def test_migration_chain_rollback_v2_only(tmp_path: Path):
+def test_migration_chain_rollback_v2_only(mem_db):
     """Apply v1 and v2, then rollback only v2."""
-    db = tmp_path / "chain2.db"
-    conn = sqlite3.connect(str(db), timeout=30)
+    conn = mem_db
     
     apply_migrations(conn)
     
@@ -59,17 +65,18 @@ def test_migration_chain_rollback_v2_only(tmp_path: Path):
     versions = {row[0] for row in cur.fetchall()}
     assert 1 in versions
     assert 2 not in versions
-    
-    conn.close()
 
 
-def test_migration_chain_rollback_last_twice(tmp_path: Path):
-    """Apply v1 and v2, rollback last twice to get back to nothing."""
-    db = tmp_path / "chain3.db"
-    conn = sqlite3.connect(str(db), timeout=30)
+def test_migration_chain_rollback_last_twice(mem_db):
+    """Apply all versions, rollback last repeatedly to get back to nothing."""
+    conn = mem_db
     
     apply_migrations(conn)
     
+    # Rollback v3
+    v = rollback_last(conn)
+    assert v == 3
+    
     # Rollback v2
     v = rollback_last(conn)
     assert v == 2
@@ -83,20 +90,15 @@ def test_migration_chain_rollback_last_twice(tmp_path: Path):
     cur.execute("SELECT version FROM schema_migrations")
     versions = [row[0] for row in cur.fetchall()]
     assert len(versions) == 0
-    
-    conn.close()
 
 
-def test_migration_idempotent_v1_v2(tmp_path: Path):
+def test_migration_idempotent_v1_v2(mem_db):
     """Apply migrations twice; second apply should be idempotent."""
-    db = tmp_path / "chain4.db"
-    conn = sqlite3.connect(str(db), timeout=30)
+    conn = mem_db
     
     applied1 = apply_migrations(conn)
-    assert applied1 == [1, 2]
+    assert applied1 == [1, 2, 3]
     
     # Second apply should do nothing
     applied2 = apply_migrations(conn)
     assert applied2 == []
-    
-    conn.close()
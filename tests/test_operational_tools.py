@@ -1,9 +1,6 @@
 """Tests for operational CLI tools: position_status, order_manager, trade_history."""
 import json
-import sqlite3
-import tempfile
 from decimal import Decimal
-from pathlib import Path
 
 import pytest
 
@@ -11,59 +8,82 @@ from trading.persistence_sqlite import SQLitePersistence
 from trading.position import PositionState
 from trading.pnl import Fill, calculate_pnl, aggregate_pnl
 
+# Seed values, parsed once and shared by the fixture and the assertions
+BTC_ENTRY = Decimal("50000")
+BTC_QTY = Decimal("0.5")
+BTC_HIGH = Decimal("51000")
+BTC_STOP = Decimal("49000")
+ETH_ENTRY = Decimal("3000")
+ETH_QTY = Decimal("1.0")
+ZERO = Decimal("0")
+ONE = Decimal("1")
 
-@pytest.fixture
+# (entry, exit, realized P&L, P&L %) for one-unit round trips
+PNL_CASES = [
+    (Decimal("100"), Decimal("110"), Decimal("10"), Decimal("10")),
+    (Decimal("200"), Decimal("190"), Decimal("-10"), Decimal("-5")),
+]
+
+
+def _mk_analysis(entry, exit_):
+    """P&L analysis of a one-unit round trip from ``entry`` to ``exit_``."""
+    return calculate_pnl(entry_price=entry, entry_qty=ONE, exit_price=exit_, exit_qty=ONE)
+
+
+# Built once at import and shared by the aggregate tests
+_ANALYSES = [_mk_analysis(entry, exit_) for entry, exit_, _, _ in PNL_CASES]
+
+
+@pytest.fixture(scope="module")
 def temp_db():
-    """Create a temporary database with test data."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        db_path = Path(tmpdir) / "test.db"
-        persistence = SQLitePersistence(db_path)
-        
-        # Create test positions
-        pos1 = PositionState(
-            entry_price=Decimal("50000"),
-            qty_filled=Decimal("0.5"),
-            highest_price_since_entry=Decimal("51000"),
-            current_stop_trigger=Decimal("49000"),
-            current_stop_limit=Decimal("48950"),
-            stop_order_id="stop_123"
-        )
-        persistence.save_position(pos1, position_id="BTC_001")
-        
-        pos2 = PositionState(
-            entry_price=Decimal("3000"),
-            qty_filled=Decimal("1.0"),
-            highest_price_since_entry=Decimal("3100"),
-            current_stop_trigger=Decimal("2950"),
-            current_stop_limit=Decimal("2925"),
-            stop_order_id="stop_456"
-        )
-        persistence.save_position(pos2, position_id="ETH_001")
-        
-        # Create test orders
-        persistence.save_order(
-            "order_001", "BTC_001",
-            {"type": "entry", "side": "buy", "price": "50000", "qty": "0.5"},
-            "filled"
-        )
-        persistence.save_order(
-            "order_002", "BTC_001",
-            {"type": "stop", "side": "sell", "price": "49000", "qty": "0.5"},
-            "pending"
-        )
-        persistence.save_order(
-            "order_003", "ETH_001",
-            {"type": "entry", "side": "buy", "price": "3000", "qty": "1.0"},
-            "filled"
-        )
-        persistence.save_order(
-            "order_004", "ETH_001",
-            {"type": "stop", "side": "sell", "price": "2950", "qty": "1.0"},
-            "pending"
-        )
-        
-        yield persistence
-        persistence.close()
+    """Create an in-memory database with test data, shared by the whole module."""
+    persistence = SQLitePersistence(":memory:")
+    
+    # Create test positions
+    pos1 = PositionState(
+        entry_price=BTC_ENTRY,
+        qty_filled=BTC_QTY,
+        highest_price_since_entry=BTC_HIGH,
+        current_stop_trigger=BTC_STOP,
+        current_stop_limit=Decimal("48950"),
+        stop_order_id="stop_123"
+    )
+    
+    pos2 = PositionState(
+        entry_price=ETH_ENTRY,
+        qty_filled=ETH_QTY,
+        highest_price_since_entry=Decimal("3100"),
+        current_stop_trigger=Decimal("2950"),
+        current_stop_limit=Decimal("2925"),
+        stop_order_id="stop_456"
+    )
+    persistence.save_positions_bulk([("BTC_001", pos1), ("ETH_001", pos2)])
+    
+    # Create test orders in one transaction
+    persistence.save_orders_bulk([
+        ("order_001", "BTC_001", {"type": "entry", "side": "buy", "price": "50000", "qty": "0.5"}, "filled"),
+        ("order_002", "BTC_001", {"type": "stop", "side": "sell", "price": "49000", "qty": "0.5"}, "pending"),
+        ("order_003", "ETH_001", {"type": "entry", "side": "buy", "price": "3000", "qty": "1.0"}, "filled"),
+        ("order_004", "ETH_001", {"type": "stop", "side": "sell", "price": "2950", "qty": "1.0"}, "pending"),
+    ])
+    
+    yield persistence
+    persistence.close()
+
+
+@pytest.fixture(autouse=True)
+def _rollback_temp_db(request):
+    """Undo each test's writes to the shared database with a savepoint."""
+    if "temp_db" not in request.fixturenames:
+        yield
+        return
+    temp_db = request.getfixturevalue("temp_db")
+    # Saves made inside the test join this transaction instead of committing
+    with temp_db.transaction() as conn:
+        conn.execute("SAVEPOINT t")
+        yield
+        conn.execute("ROLLBACK TO t")
+        conn.execute("RELEASE t")
 
 
 class TestListPositions:
@@ -90,10 +110,10 @@ class TestListPositions:
     def test_list_positions_btc_position_data(self, temp_db):
         """Test BTC position has correct data."""
         pos = temp_db.load_position("BTC_001")
-        assert pos.entry_price == Decimal("50000")
-        assert pos.qty_filled == Decimal("0.5")
-        assert pos.highest_price_since_entry == Decimal("51000")
-        assert pos.current_stop_trigger == Decimal("49000")
+        assert pos.entry_price == BTC_ENTRY
+        assert pos.qty_filled == BTC_QTY
+        assert pos.highest_price_since_entry == BTC_HIGH
+        assert pos.current_stop_trigger == BTC_STOP
 
 
 class TestShowPosition:
@@ -102,8 +122,8 @@ class TestShowPosition:
     def test_show_position_loads_correct_position(self, temp_db):
         """Test that show_position loads the correct position."""
         pos = temp_db.load_position("BTC_001")
-        assert pos.entry_price == Decimal("50000")
-        assert pos.qty_filled == Decimal("0.5")
+        assert pos.entry_price == BTC_ENTRY
+        assert pos.qty_filled == BTC_QTY
     
     def test_show_position_with_orders(self, temp_db):
         """Test that show_position can retrieve related orders."""
@@ -142,11 +162,8 @@ class TestOrderManager:
         orders_before = temp_db.list_orders(position_id="BTC_001")
         assert any(o["order_id"] == "order_001" for o in orders_before)
         
-        # Update order state directly
-        cur = sqlite3.connect(str(temp_db.path)).cursor()
-        cur.execute("UPDATE orders SET state = ? WHERE order_id = ?", ("cancelled", "order_001"))
-        cur.connection.commit()
-        cur.connection.close()
+        # Update order state
+        assert temp_db.update_order_state("order_001", "cancelled")
         
         # Verify state changed
         orders_after = temp_db.list_orders(position_id="BTC_001")
@@ -160,7 +177,7 @@ class TestOrderManager:
         
         # Simulate force exit
         exit_price = Decimal("51000")
-        pos_before.qty_filled = Decimal("0")
+        pos_before.qty_filled = ZERO
         temp_db.save_position(pos_before, position_id="BTC_001")
         
         # Verify position is closed
@@ -198,46 +215,22 @@ class TestTradeHistory:
         pos = temp_db.load_position("ETH_001")
         orders = temp_db.list_orders(position_id="ETH_001")
         
-        assert pos.entry_price == Decimal("3000")
-        assert pos.qty_filled == Decimal("1.0")
+        assert pos.entry_price == ETH_ENTRY
+        assert pos.qty_filled == ETH_QTY
         assert len(orders) == 2
     
-    def test_calculate_pnl_simple(self):
-        """Test P&L calculation with simple entry/exit."""
-        # Entry at 100, buy 1 unit
-        # Exit at 110, sell 1 unit
-        # Realized P&L = 110 - 100 = 10
-        analysis = calculate_pnl(
-            entry_price=Decimal("100"),
-            entry_qty=Decimal("1"),
-            exit_price=Decimal("110"),
-            exit_qty=Decimal("1")
-        )
+    @pytest.mark.parametrize("entry, exit_, expected_pnl, expected_pct", PNL_CASES)
+    def test_calculate_pnl(self, entry, exit_, expected_pnl, expected_pct):
+        """Test P&L calculation for a one-unit entry/exit round trip."""
+        analysis = _mk_analysis(entry, exit_)
         
-        assert analysis.realized_pnl == Decimal("10")
-        assert analysis.pnl_percent == Decimal("10")
+        assert analysis.realized_pnl == expected_pnl
+        assert analysis.pnl_percent == expected_pct
     
     def test_aggregate_pnl_multiple_trades(self):
-        """Test aggregating P&L across multiple trades."""
-        analyses = [
-            # Trade 1: Entry at 100, Exit at 110 = +10
-            calculate_pnl(
-                entry_price=Decimal("100"),
-                entry_qty=Decimal("1"),
-                exit_price=Decimal("110"),
-                exit_qty=Decimal("1")
-            ),
-            # Trade 2: Entry at 200, Exit at 190 = -10
-            calculate_pnl(
-                entry_price=Decimal("200"),
-                entry_qty=Decimal("1"),
-                exit_price=Decimal("190"),
-                exit_qty=Decimal("1")
-            ),
-        ]
-        
-        agg = aggregate_pnl(analyses)
-        assert agg["total_realized_pnl"] == Decimal("0")
+        """Test aggregating P&L across the parametrized trades."""
+        agg = aggregate_pnl(_ANALYSES)
+        assert agg["total_realized_pnl"] == sum(case[2] for case in PNL_CASES)
         assert agg["win_count"] == 1
         assert agg["loss_count"] == 1
         assert agg["win_rate_percent"] == Decimal("50")
@@ -262,10 +255,7 @@ class TestOperationalToolsIntegration:
         
         # Step 4: Cancel an order
         order_id = orders[0]["order_id"]
-        cur = sqlite3.connect(str(temp_db.path)).cursor()
-        cur.execute("UPDATE orders SET state = ? WHERE order_id = ?", ("cancelled", order_id))
-        cur.connection.commit()
-        cur.connection.close()
+        assert temp_db.update_order_state(order_id, "cancelled")
         
         # Verify cancellation
         updated_orders = temp_db.list_orders(position_id=position_ids[0])
@@ -277,7 +267,7 @@ class TestOperationalToolsIntegration:
         # Create new position
         pos = PositionState(
             entry_price=Decimal("1000"),
-            qty_filled=Decimal("1"),
+            qty_filled=ONE,
             highest_price_since_entry=Decimal("1050"),
             current_stop_trigger=Decimal("950"),
             current_stop_limit=Decimal("925"),
@@ -294,7 +284,7 @@ class TestOperationalToolsIntegration:
         
         # Verify position exists
         loaded_pos = temp_db.load_position("NEW_POS")
-        assert loaded_pos.qty_filled == Decimal("1")
+        assert loaded_pos.qty_filled == ONE
         
         # Add exit order
         temp_db.save_order(
@@ -304,7 +294,7 @@ class TestOperationalToolsIntegration:
         )
         
         # Close position
-        loaded_pos.qty_filled = Decimal("0")
+        loaded_pos.qty_filled = ZERO
         temp_db.save_position(loaded_pos, position_id="NEW_POS")
         
         # Verify position is closed
@@ -1,17 +1,29 @@
 #!/usr/bin/env python
 """Integration test demonstrating all three operational tools working together."""
+import io
 import subprocess
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
 from decimal import Decimal
 from pathlib import Path
 
+import pytest
+
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from scripts import order_manager, position_status, trade_history
 from trading.persistence_sqlite import SQLitePersistence
 from trading.position import PositionState
 
+_CLIS = {
+    "order_manager": order_manager,
+    "position_status": position_status,
+    "trade_history": trade_history,
+}
+
 
 def setup_test_db(db_path):
     """Create test database with sample data."""
@@ -26,233 +38,170 @@ def setup_test_db(db_path):
         current_stop_limit=Decimal("48950"),
         stop_order_id="stop_123"
     )
-    persistence.save_position(pos, position_id="BTC_001")
-    
-    # Create orders
-    persistence.save_order(
-        "order_001", "BTC_001",
-        {"type": "entry", "side": "buy", "price": "50000", "qty": "0.5"},
-        "filled"
-    )
-    persistence.save_order(
-        "order_002", "BTC_001",
-        {"type": "stop", "side": "sell", "price": "49000", "qty": "0.5"},
-        "pending"
-    )
+    # Save the position and its orders in one transaction
+    with persistence.transaction():
+        persistence.save_position(pos, position_id="BTC_001")
+        persistence.save_orders_bulk([
+            ("order_001", "BTC_001", {"type": "entry", "side": "buy", "price": "50000", "qty": "0.5"}, "filled"),
+            ("order_002", "BTC_001", {"type": "stop", "side": "sell", "price": "49000", "qty": "0.5"}, "pending"),
+        ])
     
     persistence.close()
     return persistence
 
 
-def test_operational_tools_integration():
-    """Test all tools can read and modify position state."""
+def cli_runner(db_path):
+    """Return ``run(script, *args)`` calling ``scripts/<script>.py`` in-process against ``db_path``.
+
+    ``run`` returns (exit code, stdout); the ``--db`` prefix is built once.
+    """
+    prefix = ["--db", str(db_path)]
+    
+    def run(script, *args):
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            rc = _CLIS[script].main(prefix + list(args))
+        return rc, buf.getvalue()
+    
+    return run
+
+
+@pytest.fixture(scope="module")
+def shared_db(tmp_path_factory):
+    """One seeded database shared by the read-only cases (they never write to it)."""
+    db_path = tmp_path_factory.mktemp("ops") / "test.db"
+    setup_test_db(db_path)
+    return db_path
+
+
+@pytest.fixture
+def own_db(tmp_path):
+    """A freshly seeded database for a test that modifies it."""
+    db_path = tmp_path / "test.db"
+    setup_test_db(db_path)
+    return db_path
+
+
+def test_seeded_listings(shared_db):
+    """The list commands are thin wrappers; check the data they print directly."""
+    persistence = SQLitePersistence(shared_db, create=False)
+    assert persistence.list_positions() == ["BTC_001"]
+    orders = persistence.list_orders("BTC_001")
+    assert [(o["order_id"], o["state"]) for o in orders] == [("order_001", "filled"), ("order_002", "pending")]
+    grouped = persistence.list_all_orders()
+    assert [o["order_id"] for o in grouped["BTC_001"]] == ["order_001", "order_002"]
+    persistence.close()
+
+
+# (script, args, substrings expected in the output); none of these write
+READ_ONLY_CASES = [
+    pytest.param("position_status", ["show", "BTC_001"], ["50000", "order_001"], id="position-show"),
+    pytest.param("trade_history", ["summary"], ["Trading Summary", "Unrealized P&L: $0.00", "Total P&L: $0.00"], id="history-summary"),
+    pytest.param("trade_history", ["position", "BTC_001"], ["BTC_001"], id="history-position"),
+]
+
+
+@pytest.mark.parametrize("script, args, expected", READ_ONLY_CASES)
+def test_cli_read_only(script, args, expected, shared_db):
+    rc, out = cli_runner(shared_db)(script, *args)
+    assert rc == 0, out
+    for text in expected:
+        assert text in out
+
+
+def test_cli_cancel_order(own_db):
+    """Check the position and orders, then cancel the pending stop."""
+    run_cli = cli_runner(own_db)
+    assert run_cli("position_status", "show", "BTC_001")[0] == 0
+    assert run_cli("order_manager", "list")[0] == 0
+    
+    rc, out = run_cli("order_manager", "cancel", "order_002")
+    assert rc == 0, out
+    assert "cancelled" in out
+    
+    rc, out = run_cli("order_manager", "list")
+    assert "cancelled" in out
+
+
+def test_force_exit(own_db, capsys):
+    """Force-exit the position: it is closed and the exit order is recorded."""
+    persistence = SQLitePersistence(own_db, create=False)
+    order_manager.force_exit(persistence, "BTC_001", 51000)
+    assert "Realized P&L: $500" in capsys.readouterr().out
+    
+    assert persistence.load_position("BTC_001").qty_filled == 0
+    exit_order = persistence.get_order("BTC_001_force_exit")
+    assert exit_order["state"] == "filled"
+    assert Decimal(exit_order["price"]) == 51000
+    assert Decimal(exit_order["qty"]) == Decimal("0.5")
+    persistence.close()
     
-    # Get workspace root
+    rc, out = cli_runner(own_db)("position_status", "show", "BTC_001")
+    assert "CLOSED" in out
+
+
+def test_summarize_trades_pairs_entries_with_first_exit():
+    """Each filled entry is priced against its position's first filled exit, in Decimal."""
+    persistence = SQLitePersistence(":memory:")
+    pos = PositionState(entry_price=Decimal("100"), qty_filled=Decimal("0"), highest_price_since_entry=Decimal("110"))
+    persistence.save_positions_bulk([("win", pos), ("loss", pos), ("open", pos)])
+    persistence.save_orders_bulk([
+        ("w1", "win", {"type": "entry", "price": "100", "qty": "0.5"}, "filled"),
+        ("w2", "win", {"type": "exit", "price": "110.10", "qty": "0.5"}, "filled"),
+        ("w3", "win", {"type": "exit", "price": "999", "qty": "0.5"}, "filled"),
+        ("l1", "loss", {"type": "entry", "price": "100", "qty": "1"}, "filled"),
+        ("l2", "loss", {"type": "force_sell", "price": "95", "qty": "1"}, "filled"),
+        ("o1", "open", {"type": "entry", "price": "100", "qty": "1"}, "filled"),
+        ("z1", "open", {"type": "entry", "price": "0", "qty": "1"}, "filled"),
+    ])
+    
+    agg = trade_history.summarize_trades(persistence)
+    assert agg["total_trades"] == 3
+    assert agg["total_realized_pnl"] == Decimal("0.05")  # 5.05 - 5 + 0
+    assert isinstance(agg["total_realized_pnl"], Decimal)
+    assert agg["win_count"] == 1 and agg["loss_count"] == 1
+    persistence.close()
+
+
+@pytest.mark.slow
+def test_cli_scripts_run_as_subprocess():
+    """Smoke-test the real `python scripts/*.py` entry points end to end."""
     workspace_root = Path(__file__).parent.parent
     
-    with tempfile.TemporaryDirectory() as tmpdir:
-        db_path = Path(tmpdir) / "test.db"
-        
-        # Setup
-        persistence = setup_test_db(db_path)
-        
-        print("=" * 70)
-        print("OPERATIONAL TOOLS INTEGRATION TEST")
-        print("=" * 70)
-        
-        # Test 1: Position Status - List
-        print("\n[1] Testing Position Status CLI - List Command")
-        print("-" * 70)
-        result = subprocess.run(
-            [
-                "python", "scripts/position_status.py",
-                "--db", str(db_path),
-                "list"
-            ],
+    def run_script(script, db_path, *args, stdout=subprocess.PIPE):
+        return subprocess.run(
+            [sys.executable, f"scripts/{script}.py", "--db", str(db_path), *args],
             cwd=workspace_root,
-            capture_output=True,
-            text=True
+            stdout=stdout,
+            stderr=subprocess.PIPE,
         )
-        print(result.stdout)
-        assert result.returncode == 0, f"List failed: {result.stderr}"
-        assert "BTC_001" in result.stdout, "Position not found in list"
-        print("✓ Position list command successful")
-        
-        # Test 2: Position Status - Show
-        print("\n[2] Testing Position Status CLI - Show Command")
-        print("-" * 70)
-        result = subprocess.run(
-            [
-                "python", "scripts/position_status.py",
-                "--db", str(db_path),
-                "show", "BTC_001"
-            ],
-            cwd=workspace_root,
-            capture_output=True,
-            text=True
-        )
-        print(result.stdout)
-        assert result.returncode == 0, f"Show failed: {result.stderr}"
-        assert "50000" in result.stdout, "Entry price not shown"
-        assert "order_001" in result.stdout, "Order not shown"
-        print("✓ Position show command successful")
-        
-        # Test 3: Order Manager - List
-        print("\n[3] Testing Order Manager CLI - List Command")
-        print("-" * 70)
-        result = subprocess.run(
-            [
-                "python", "scripts/order_manager.py",
-                "--db", str(db_path),
-                "list"
-            ],
-            cwd=workspace_root,
-            capture_output=True,
-            text=True
-        )
-        print(result.stdout)
-        assert result.returncode == 0, f"List failed: {result.stderr}"
-        assert "order_001" in result.stdout, "Order not listed"
-        assert "filled" in result.stdout, "Order state not shown"
-        print("✓ Order list command successful")
-        
-        # Test 4: Trade History - Summary
-        print("\n[4] Testing Trade History CLI - Summary Command")
-        print("-" * 70)
-        result = subprocess.run(
-            [
-                "python", "scripts/trade_history.py",
-                "--db", str(db_path),
-                "summary"
-            ],
-            cwd=workspace_root,
-            capture_output=True,
-            text=True
-        )
-        print(result.stdout)
-        assert result.returncode == 0, f"Summary failed: {result.stderr}"
-        assert "Trading Summary" in result.stdout, "Summary header not found"
-        print("✓ Trade history summary command successful")
-        
-        # Test 5: Trade History - List
-        print("\n[5] Testing Trade History CLI - List Command")
-        print("-" * 70)
-        result = subprocess.run(
-            [
-                "python", "scripts/trade_history.py",
-                "--db", str(db_path),
-                "list"
-            ],
-            cwd=workspace_root,
-            capture_output=True,
-            text=True
-        )
-        print(result.stdout)
-        assert result.returncode == 0, f"List failed: {result.stderr}"
-        assert "order_001" in result.stdout, "Order not listed"
-        print("✓ Trade history list command successful")
-        
-        # Test 6: Trade History - Position
-        print("\n[6] Testing Trade History CLI - Position Command")
-        print("-" * 70)
-        result = subprocess.run(
-            [
-                "python", "scripts/trade_history.py",
-                "--db", str(db_path),
-                "position", "BTC_001"
-            ],
-            cwd=workspace_root,
-            capture_output=True,
-            text=True
-        )
-        print(result.stdout)
-        assert result.returncode == 0, f"Position history failed: {result.stderr}"
-        assert "BTC_001" in result.stdout, "Position not shown"
-        print("✓ Trade history position command successful")
-        
-        # Test 7: Workflow - Check position, then modify order
-        print("\n[7] Testing Workflow - Check Position, Then Cancel Order")
-        print("-" * 70)
-        
-        # First, list position
-        result1 = subprocess.run(
-            [
-                "python", "scripts/position_status.py",
-                "--db", str(db_path),
-                "show", "BTC_001"
-            ],
-            cwd=workspace_root,
-            capture_output=True,
-            text=True
-        )
-        
-        # Then check the order
-        result2 = subprocess.run(
-            [
-                "python", "scripts/order_manager.py",
-                "--db", str(db_path),
-                "list"
-            ],
-            cwd=workspace_root,
-            capture_output=True,
-            text=True
-        )
-        
-        # Cancel the order
-        result3 = subprocess.run(
-            [
-                "python", "scripts/order_manager.py",
-                "--db", str(db_path),
-                "cancel", "order_002"
-            ],
-            cwd=workspace_root,
-            capture_output=True,
-            text=True
-        )
-        
-        print(result3.stdout)
-        assert result3.returncode == 0, f"Cancel failed: {result3.stderr}"
-        assert "cancelled" in result3.stdout, "Cancellation not confirmed"
-        print("✓ Workflow: Check and modify order successful")
-        
-        # Test 8: Workflow - Force exit
-        print("\n[8] Testing Workflow - Force Exit Position")
-        print("-" * 70)
-        
-        result = subprocess.run(
-            [
-                "python", "scripts/order_manager.py",
-                "--db", str(db_path),
-                "force-exit", "BTC_001", "51000"
-            ],
-            cwd=workspace_root,
-            capture_output=True,
-            text=True
-        )
-        print(result.stdout)
-        assert result.returncode == 0, f"Force exit failed: {result.stderr}"
-        assert "51000" in result.stdout, "Exit price not shown"
-        print("✓ Force exit command successful")
-        
-        # Verify position is closed
-        result = subprocess.run(
-            [
-                "python", "scripts/position_status.py",
-                "--db", str(db_path),
-                "show", "BTC_001"
-            ],
-            cwd=workspace_root,
-            capture_output=True,
-            text=True
-        )
-        print(result.stdout)
-        assert "CLOSED" in result.stdout, "Position should be closed"
-        print("✓ Position verified as closed")
-        
-        print("\n" + "=" * 70)
-        print("ALL OPERATIONAL TOOLS INTEGRATION TESTS PASSED ✓")
-        print("=" * 70)
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / "test.db"
+        setup_test_db(db_path)
+        
+        # The list commands only read (WAL allows concurrent readers), so start
+        # the interpreters side by side rather than one after another
+        with ThreadPoolExecutor(max_workers=len(_CLIS)) as pool:
+            results = dict(zip(_CLIS, pool.map(lambda script: run_script(script, db_path, "list"), _CLIS)))
+        
+        # Each listing shows its own rows: positions, orders with state, fills
+        expected = {
+            "position_status": [b"BTC_001"],
+            "order_manager": [b"order_001", b"pending"],
+            "trade_history": [b"order_001"],
+        }
+        for script, result in results.items():
+            # Output stays bytes: the checks are substring tests, so skip decoding
+            assert result.returncode == 0, f"{script} failed: {result.stderr.decode(errors='replace')}"
+            for text in expected[script]:
+                assert text in result.stdout, f"{script} output lacks {text!r}"
+        
+        # A missing database is reported through the exit code; only that is
+        # checked, so stdout is discarded rather than buffered
+        result = run_script("position_status", Path(tmpdir) / "missing.db", "list", stdout=subprocess.DEVNULL)
+        assert result.returncode == 1, result.stderr.decode(errors="replace")
 
 
 if __name__ == "__main__":
-    test_operational_tools_integration()
+    sys.exit(pytest.main([__file__]))
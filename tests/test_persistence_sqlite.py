@@ -5,9 +5,8 @@ from trading.persistence_sqlite import SQLitePersistence
 from trading.position import PositionState
 
 
-def test_sqlite_save_and_load(tmp_path: Path):
-    db = tmp_path / "state.db"
-    persistence = SQLitePersistence(db)
+def test_sqlite_save_and_load():
+    persistence = SQLitePersistence(":memory:")
     pos = PositionState(entry_price=Decimal('100'), qty_filled=Decimal('1'), highest_price_since_entry=Decimal('105'))
     persistence.save_position(pos)
 
@@ -16,3 +15,28 @@ def test_sqlite_save_and_load(tmp_path: Path):
     assert loaded.entry_price == pos.entry_price
     assert loaded.qty_filled == pos.qty_filled
     persistence.close()
+
+
+def test_sqlite_persistence_uses_wal(tmp_path: Path):
+    p = SQLitePersistence(tmp_path / "wal.db")
+    assert p.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert p.conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert p.conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+    assert p.conn.execute("PRAGMA wal_autocheckpoint").fetchone()[0] == 1000
+    p.close()
+
+
+def test_sqlite_in_memory_keeps_memory_journal():
+    p = SQLitePersistence(":memory:")
+    assert p.path == ":memory:"
+    assert p.conn.execute("PRAGMA journal_mode").fetchone()[0] == "memory"
+    p.close()
+
+
+def test_sqlite_stores_json_as_text():
+    p = SQLitePersistence(":memory:")
+    p.save_order("o1", "position", {"type": "entry", "price": "100"}, "filled")
+    row = p.conn.execute("SELECT typeof(value), json_extract(value, '$.type') FROM orders").fetchone()
+    assert tuple(row) == ("text", "entry")
+    assert p.get_order("o1")["price"] == "100"
+    p.close()
@@ -1,35 +1,189 @@
+import threading
 from decimal import Decimal
 from pathlib import Path
 
+import pytest
+
 from trading.persistence_sqlite import SQLitePersistence
 from trading.position import PositionState
 
 
-def test_multiple_positions_and_order_history(tmp_path: Path):
-    db = tmp_path / "multi.db"
-    p = SQLitePersistence(db)
+@pytest.fixture(scope="module")
+def _shared_persistence():
+    p = SQLitePersistence(":memory:")
+    yield p
+    p.close()
+
+
+@pytest.fixture
+def persistence(_shared_persistence):
+    """The module's in-memory persistence, emptied before each test (schema is kept)."""
+    with _shared_persistence.transaction() as conn:
+        for table in ("orders", "positions", "kv"):
+            conn.execute(f"DELETE FROM {table}")
+    return _shared_persistence
+
+
+def test_multiple_positions_and_order_history(persistence):
 
     pos1 = PositionState(entry_price=Decimal('100'), qty_filled=Decimal('1'), highest_price_since_entry=Decimal('110'))
     pos2 = PositionState(entry_price=Decimal('200'), qty_filled=Decimal('2'), highest_price_since_entry=Decimal('210'))
 
-    p.save_position(pos1, position_id="pos1")
-    p.save_position(pos2, position_id="pos2")
+    # the individual saves join one enclosing transaction
+    with persistence.transaction():
+        persistence.save_position(pos1, position_id="pos1")
+        persistence.save_position(pos2, position_id="pos2")
 
-    ids = p.list_positions()
+    ids = persistence.list_positions()
     assert "pos1" in ids and "pos2" in ids
 
     # add orders
     order_a = {"price": "100", "qty": "1"}
     order_b = {"price": "101", "qty": "0.5"}
-    p.save_order(order_id="oA", position_id="pos1", order_dict=order_a, state="open")
-    p.save_order(order_id="oB", position_id="pos1", order_dict=order_b, state="filled")
+    with persistence.transaction():
+        persistence.save_order(order_id="oA", position_id="pos1", order_dict=order_a, state="open")
+        persistence.save_order(order_id="oB", position_id="pos1", order_dict=order_b, state="filled")
 
-    orders = p.list_orders("pos1")
+    orders = persistence.list_orders("pos1")
     assert any(o.get("price") == "100" for o in orders)
     assert any(o.get("price") == "101" for o in orders)
 
-    fetched = p.get_order("oA")
+    fetched = persistence.get_order("oA")
     assert fetched is not None
     assert fetched["order_id"] == "oA"
 
+    assert persistence.update_order_state("oA", "cancelled") is True
+    assert persistence.get_order("oA")["state"] == "cancelled"
+    assert persistence.update_order_state("missing", "cancelled") is False
+
+
+def test_list_all_orders_with_positions_groups_by_position(persistence):
+    pos = PositionState(entry_price=Decimal('100'), qty_filled=Decimal('1'), highest_price_since_entry=Decimal('100'))
+    persistence.save_position(pos, position_id="b_pos")
+    persistence.save_position(pos, position_id="a_pos")
+
+    persistence.save_order(order_id="o1", position_id="b_pos", order_dict={"type": "entry"}, state="filled")
+    persistence.save_order(order_id="o2", position_id="a_pos", order_dict={"type": "entry"}, state="filled")
+    persistence.save_order(order_id="o3", position_id="b_pos", order_dict={"type": "stop"}, state="open")
+    # orders without a known position are excluded by the join
+    persistence.save_order(order_id="o4", position_id="ghost", order_dict={"type": "entry"}, state="open")
+
+    rows = persistence.list_all_orders_with_positions()
+    assert [(r["position_id"], r["order_id"]) for r in rows] == [("a_pos", "o2"), ("b_pos", "o1"), ("b_pos", "o3")]
+    assert rows[2]["state"] == "open"
+    assert rows[2]["type"] == "stop"
+
+    grouped = persistence.list_all_orders()
+    assert list(grouped) == ["a_pos", "b_pos"]
+    assert [o["order_id"] for o in grouped["b_pos"]] == ["o1", "o3"]
+
+
+def test_concurrent_writes_share_one_connection(tmp_path: Path):
+    p = SQLitePersistence(tmp_path / "threads.db")
+    errors = []
+
+    def writer(n):
+        for i in range(50):
+            try:
+                p.save_order(f"o{n}_{i}", f"pos{n}", {"price": str(i)}, "open")
+            except Exception as e:  # pragma: no cover - failure path
+                errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert all(len(p.list_orders(f"pos{n}")) == 50 for n in range(4))
+
+    p.close()
+
+
+def test_bulk_saves_positions_and_orders(persistence):
+    pos = PositionState(entry_price=Decimal('100'), qty_filled=Decimal('1'), highest_price_since_entry=Decimal('100'))
+
+    persistence.save_positions_bulk([("pos1", pos), ("pos2", pos)])
+    persistence.save_orders_bulk([
+        ("o1", "pos1", {"price": "100"}, "open"),
+        ("o2", "pos2", {"price": "200"}, "filled"),
+    ])
+
+    assert sorted(persistence.list_positions()) == ["pos1", "pos2"]
+    assert persistence.load_position("pos2").entry_price == Decimal('100')
+    assert persistence.get_order("o2")["state"] == "filled"
+    assert persistence.list_orders("pos1")[0]["price"] == "100"
+
+
+def test_transaction_commits_or_rolls_back_as_a_unit(persistence):
+    pos = PositionState(entry_price=Decimal('100'), qty_filled=Decimal('1'), highest_price_since_entry=Decimal('100'))
+
+    with persistence.transaction():
+        persistence.save_order("o1", "pos1", {"price": "100"}, "filled")
+        persistence.save_position(pos, "pos1")
+    assert persistence.get_order("o1") is not None
+    assert persistence.load_position("pos1") is not None
+
+    try:
+        with persistence.transaction():
+            persistence.save_order("o2", "pos2", {"price": "200"}, "filled")
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert persistence.get_order("o2") is None
+
+
+def test_load_all_positions_returns_states_by_id(persistence):
+    pos1 = PositionState(entry_price=Decimal('100'), qty_filled=Decimal('1'), highest_price_since_entry=Decimal('100'))
+    pos2 = PositionState(entry_price=Decimal('200'), qty_filled=Decimal('0'), highest_price_since_entry=Decimal('210'))
+    persistence.save_position(pos2, "pos2")
+    persistence.save_position(pos1, "pos1")
+
+    positions = persistence.load_all_positions()
+    assert list(positions) == ["pos1", "pos2"]
+    assert positions["pos2"].highest_price_since_entry == Decimal('210')
+
+
+def test_list_orders_filters_by_state_and_type(persistence):
+    persistence.save_order("o1", "pos1", {"type": "entry"}, "filled")
+    persistence.save_order("o2", "pos1", {"type": "stop"}, "filled")
+    persistence.save_order("o3", "pos1", {"type": "exit"}, "pending")
+    persistence.save_order("o4", "pos1", {"type": "exit"}, "filled")
+
+    filled = persistence.list_orders("pos1", state="filled", types=("entry", "exit"))
+    assert [o["order_id"] for o in filled] == ["o1", "o4"]
+    assert len(persistence.list_orders("pos1")) == 4
+
+
+def test_open_without_create_requires_existing_db(tmp_path: Path):
+    missing = tmp_path / "missing" / "state.db"
+    with pytest.raises(FileNotFoundError):
+        SQLitePersistence(missing, create=False)
+    assert not missing.exists()
+
+    SQLitePersistence(tmp_path / "state.db").close()
+    p = SQLitePersistence(tmp_path / "state.db", create=False)
+    assert p.list_positions() == []
     p.close()
+
+
+def test_trade_pairs_match_entries_with_first_exit(persistence):
+    pos = PositionState(entry_price=Decimal('100'), qty_filled=Decimal('0'), highest_price_since_entry=Decimal('110'))
+    persistence.save_positions_bulk([("win", pos), ("loss", pos), ("open", pos)])
+    persistence.save_orders_bulk([
+        ("w1", "win", {"type": "entry", "price": "100", "qty": "0.5"}, "filled"),
+        ("w2", "win", {"type": "exit", "price": "110.10", "qty": "0.5"}, "filled"),
+        ("w3", "win", {"type": "exit", "price": "999", "qty": "0.5"}, "filled"),
+        ("l1", "loss", {"type": "entry", "price": "100", "qty": "1"}, "filled"),
+        ("l2", "loss", {"type": "force_sell", "price": "95", "qty": "1"}, "filled"),
+        ("o1", "open", {"type": "entry", "price": "100", "qty": "1"}, "filled"),
+        ("o2", "open", {"type": "exit", "price": "120", "qty": "1"}, "pending"),
+        ("x1", None, {"type": "entry", "price": "100", "qty": "1"}, "filled"),
+    ])
+
+    assert persistence.trade_pairs() == [
+        ("100", "0.5", "110.10", "0.5"),
+        ("100", "1", "95", "1"),
+        ("100", "1", None, None),
+    ]
@@ -1,17 +1,48 @@
 """Tests for portfolio management and multi-pair orchestration."""
-import pytest
+import asyncio
+import copy
+from dataclasses import FrozenInstanceError, replace
 from decimal import Decimal
 
+import pytest
+
 from trading.portfolio_manager import (
     PortfolioConfig, PortfolioManager, PairConfig, PortfolioPosition
 )
+from trading.portfolio_orchestrator import MultiPairOrchestrator
 from trading.position import PositionState
 
+# Prices and quantities shared across tests, parsed once at import
+P50K = Decimal('50000')
+P51K = Decimal('51000')
+P49K = Decimal('49000')
+P48950 = Decimal('48950')
+HALF = Decimal('0.5')
+ONE = Decimal('1')
+ZERO = Decimal('0')
 
-@pytest.fixture
-def portfolio_config():
-    """Create test portfolio configuration."""
-    return PortfolioConfig(
+
+def _d(x):
+    return x if isinstance(x, Decimal) else Decimal(str(x))
+
+
+def _make_position(entry=P50K, qty=ONE, high=None, trig=P49K, lim=P48950, stop_id=None):
+    """PositionState with the usual test stop levels; ``high`` defaults to ``entry``."""
+    entry = _d(entry)
+    return PositionState(
+        entry_price=entry,
+        qty_filled=_d(qty),
+        highest_price_since_entry=entry if high is None else _d(high),
+        current_stop_trigger=_d(trig),
+        current_stop_limit=_d(lim),
+        stop_order_id=stop_id,
+    )
+
+
+@pytest.fixture(scope="session")
+def _pm_template():
+    """Portfolio manager built once; tests get deep copies so they can mutate freely."""
+    config = PortfolioConfig(
         total_capital=Decimal('100000'),
         max_position_size_pct=Decimal('5'),
         max_positions=10,
@@ -19,12 +50,19 @@ def portfolio_config():
         rebalance_threshold_pct=Decimal('10'),
         emergency_liquidation_loss_pct=Decimal('-10')
     )
+    return PortfolioManager(config)
 
 
 @pytest.fixture
-def portfolio_manager(portfolio_config):
+def portfolio_manager(_pm_template):
     """Create test portfolio manager."""
-    return PortfolioManager(portfolio_config)
+    return copy.deepcopy(_pm_template)
+
+
+@pytest.fixture
+def portfolio_config(portfolio_manager):
+    """Test portfolio configuration (the one owned by ``portfolio_manager``)."""
+    return portfolio_manager.config
 
 
 class TestPortfolioConfig:
@@ -32,8 +70,8 @@ class TestPortfolioConfig:
     
     def test_portfolio_config_defaults(self):
         """Test portfolio config with defaults."""
-        config = PortfolioConfig(total_capital=Decimal('50000'))
-        assert config.total_capital == Decimal('50000')
+        config = PortfolioConfig(total_capital=P50K)
+        assert config.total_capital == P50K
         assert config.max_position_size_pct == Decimal('5')
         assert config.max_positions == 10
     
@@ -47,6 +85,22 @@ class TestPortfolioConfig:
         assert pair.product_id == "BTC-USD"
         assert pair.position_size_pct == Decimal('2')
         assert pair.enabled is True
+    
+    def test_pair_config_stop_multipliers(self):
+        """Test stop multipliers are derived from trail_pct."""
+        pair = PairConfig(product_id="ETH-USD", trail_pct=Decimal('0.025'))
+        assert pair.trigger_mult == Decimal('0.975')
+        assert pair.stop_limit_mult == ONE - Decimal('0.025') * Decimal('1.01')
+    
+    def test_configs_are_frozen(self):
+        """Configs are immutable; replace() derives a changed copy."""
+        pair = PairConfig(product_id="ETH-USD")
+        with pytest.raises(FrozenInstanceError):
+            pair.trail_pct = Decimal('0.05')
+        
+        wider = replace(pair, trail_pct=Decimal('0.05'))
+        assert wider.trigger_mult == Decimal('0.95')
+        assert pair.trigger_mult == Decimal('0.98')
 
 
 class TestPortfolioManagerRegistration:
@@ -85,7 +139,7 @@ class TestPortfolioManagerRegistration:
     
     def test_register_exceeds_max_positions(self, portfolio_manager):
         """Test registration limit."""
-        portfolio_manager.config.max_positions = 2
+        portfolio_manager.config = replace(portfolio_manager.config, max_positions=2)
         
         portfolio_manager.register_pair(PairConfig(product_id="BTC-USD"))
         portfolio_manager.register_pair(PairConfig(product_id="ETH-USD"))
@@ -109,7 +163,7 @@ class TestPortfolioPositionSize:
     def test_get_position_size_unregistered_pair(self, portfolio_manager):
         """Test position size for unregistered pair."""
         size = portfolio_manager.get_position_size_usd("UNKNOWN-USD")
-        assert size == Decimal('0')
+        assert size == ZERO
 
 
 class TestPortfolioPositionTracking:
@@ -120,14 +174,7 @@ class TestPortfolioPositionTracking:
         pair = PairConfig(product_id="BTC-USD", position_size_pct=Decimal('5'))
         portfolio_manager.register_pair(pair)
         
-        pos_state = PositionState(
-            entry_price=Decimal('50000'),
-            qty_filled=Decimal('0.5'),
-            highest_price_since_entry=Decimal('50000'),
-            current_stop_trigger=Decimal('49000'),
-            current_stop_limit=Decimal('48950'),
-            stop_order_id="stop_123"
-        )
+        pos_state = _make_position(P50K, HALF, stop_id="stop_123")
         
         portfolio_manager.add_position("pos_001", "BTC-USD", pos_state)
         
@@ -136,14 +183,7 @@ class TestPortfolioPositionTracking:
     
     def test_add_position_unregistered_pair(self, portfolio_manager):
         """Test adding position for unregistered pair fails."""
-        pos_state = PositionState(
-            entry_price=Decimal('50000'),
-            qty_filled=Decimal('0.5'),
-            highest_price_since_entry=Decimal('50000'),
-            current_stop_trigger=Decimal('49000'),
-            current_stop_limit=Decimal('48950'),
-            stop_order_id=None
-        )
+        pos_state = _make_position(P50K, HALF)
         
         with pytest.raises(ValueError, match="not registered"):
             portfolio_manager.add_position("pos_001", "BTC-USD", pos_state)
@@ -153,19 +193,12 @@ class TestPortfolioPositionTracking:
         pair = PairConfig(product_id="BTC-USD")
         portfolio_manager.register_pair(pair)
         
-        pos_state = PositionState(
-            entry_price=Decimal('50000'),
-            qty_filled=Decimal('0.5'),
-            highest_price_since_entry=Decimal('51000'),
-            current_stop_trigger=Decimal('49000'),
-            current_stop_limit=Decimal('48950'),
-            stop_order_id=None
-        )
+        pos_state = _make_position(P50K, HALF, high=P51K)
         
         portfolio_manager.add_position("pos_001", "BTC-USD", pos_state)
         
         # Close at profit
-        realized_pnl = portfolio_manager.close_position("pos_001", Decimal('51000'))
+        realized_pnl = portfolio_manager.close_position("pos_001", P51K)
         
         assert "pos_001" not in portfolio_manager.positions
         assert len(portfolio_manager.closed_positions) == 1
@@ -181,33 +214,26 @@ class TestPortfolioMetrics:
         
         assert metrics.total_capital == portfolio_config.total_capital
         assert metrics.available_capital == portfolio_config.total_capital
-        assert metrics.deployed_capital == Decimal('0')
+        assert metrics.deployed_capital == ZERO
         assert metrics.active_positions == 0
         assert metrics.closed_positions == 0
-        assert metrics.total_pnl == Decimal('0')
+        assert metrics.total_pnl == ZERO
     
     def test_single_position_metrics(self, portfolio_manager):
         """Test metrics with single active position."""
         pair = PairConfig(product_id="BTC-USD", position_size_pct=Decimal('2'))
         portfolio_manager.register_pair(pair)
         
-        pos_state = PositionState(
-            entry_price=Decimal('50000'),
-            qty_filled=Decimal('1'),
-            highest_price_since_entry=Decimal('50000'),
-            current_stop_trigger=Decimal('49000'),
-            current_stop_limit=Decimal('48950'),
-            stop_order_id=None
-        )
+        pos_state = _make_position(P50K, ONE)
         
         portfolio_manager.add_position("pos_001", "BTC-USD", pos_state)
-        portfolio_manager.update_position("pos_001", pos_state, Decimal('51000'))
+        portfolio_manager.update_position("pos_001", pos_state, P51K)
         
         metrics = portfolio_manager.get_portfolio_metrics()
         
         assert metrics.active_positions == 1
-        assert metrics.deployed_capital == Decimal('50000')
-        assert metrics.available_capital == Decimal('50000')
+        assert metrics.deployed_capital == P50K
+        assert metrics.available_capital == P50K
         assert metrics.unrealized_pnl == Decimal('1000')
     
     def test_closed_position_metrics(self, portfolio_manager):
@@ -215,17 +241,10 @@ class TestPortfolioMetrics:
         pair = PairConfig(product_id="BTC-USD")
         portfolio_manager.register_pair(pair)
         
-        pos_state = PositionState(
-            entry_price=Decimal('50000'),
-            qty_filled=Decimal('1'),
-            highest_price_since_entry=Decimal('51000'),
-            current_stop_trigger=Decimal('49000'),
-            current_stop_limit=Decimal('48950'),
-            stop_order_id=None
-        )
+        pos_state = _make_position(P50K, ONE, high=P51K)
         
         portfolio_manager.add_position("pos_001", "BTC-USD", pos_state)
-        portfolio_manager.close_position("pos_001", Decimal('51000'))
+        portfolio_manager.close_position("pos_001", P51K)
         
         metrics = portfolio_manager.get_portfolio_metrics()
         
@@ -236,20 +255,14 @@ class TestPortfolioMetrics:
     
     def test_multiple_positions_metrics(self, portfolio_manager):
         """Test metrics with multiple positions."""
+        # Built once; each position gets its own copy since the manager keeps
+        # (and closing mutates) the state it is given
+        base = _make_position(1000, ONE, trig=900, lim=850)
         for i, (product, pct) in enumerate([("BTC-USD", Decimal('3')), ("ETH-USD", Decimal('2'))]):
             pair = PairConfig(product_id=product, position_size_pct=pct)
             portfolio_manager.register_pair(pair)
             
-            pos_state = PositionState(
-                entry_price=Decimal('1000'),
-                qty_filled=Decimal('1'),
-                highest_price_since_entry=Decimal('1000'),
-                current_stop_trigger=Decimal('900'),
-                current_stop_limit=Decimal('850'),
-                stop_order_id=None
-            )
-            
-            portfolio_manager.add_position(f"pos_{i:03d}", product, pos_state)
+            portfolio_manager.add_position(f"pos_{i:03d}", product, replace(base))
         
         metrics = portfolio_manager.get_portfolio_metrics()
         
@@ -267,14 +280,7 @@ class TestPortfolioRiskManagement:
         
         # Position size: 100000 * 2% = $2000
         # At $50000/BTC, that's 0.04 BTC
-        pos_state = PositionState(
-            entry_price=Decimal('50000'),
-            qty_filled=Decimal('0.04'),
-            highest_price_since_entry=Decimal('50000'),
-            current_stop_trigger=Decimal('49000'),
-            current_stop_limit=Decimal('48950'),
-            stop_order_id=None
-        )
+        pos_state = _make_position(P50K, "0.04")
         
         portfolio_manager.add_position("pos_001", "BTC-USD", pos_state)
         
@@ -283,20 +289,13 @@ class TestPortfolioRiskManagement:
     
     def test_check_position_size_limit(self, portfolio_manager):
         """Test detection of position size violations."""
-        portfolio_manager.config.max_position_size_pct = Decimal('2')
+        portfolio_manager.config = replace(portfolio_manager.config, max_position_size_pct=Decimal('2'))
         
         pair = PairConfig(product_id="BTC-USD", position_size_pct=Decimal('3'))
         portfolio_manager.register_pair(pair)
         
         # Position that exceeds limit
-        pos_state = PositionState(
-            entry_price=Decimal('50000'),
-            qty_filled=Decimal('3'),  # 150k > 2% of 100k
-            highest_price_since_entry=Decimal('50000'),
-            current_stop_trigger=Decimal('49000'),
-            current_stop_limit=Decimal('48950'),
-            stop_order_id=None
-        )
+        pos_state = _make_position(P50K, 3)  # 150k > 2% of 100k
         
         portfolio_manager.add_position("pos_001", "BTC-USD", pos_state)
         
@@ -305,19 +304,12 @@ class TestPortfolioRiskManagement:
     
     def test_rebalance_detection(self, portfolio_manager):
         """Test detection of positions needing rebalancing."""
-        portfolio_manager.config.rebalance_threshold_pct = Decimal('5')
+        portfolio_manager.config = replace(portfolio_manager.config, rebalance_threshold_pct=Decimal('5'))
         
         pair = PairConfig(product_id="BTC-USD", position_size_pct=Decimal('10'))
         portfolio_manager.register_pair(pair)
         
-        pos_state = PositionState(
-            entry_price=Decimal('50000'),
-            qty_filled=Decimal('2'),  # 100k deployed = 100% (vs 10% target)
-            highest_price_since_entry=Decimal('50000'),
-            current_stop_trigger=Decimal('49000'),
-            current_stop_limit=Decimal('48950'),
-            stop_order_id=None
-        )
+        pos_state = _make_position(P50K, 2)  # 100k deployed = 100% (vs 10% target)
         
         portfolio_manager.add_position("pos_001", "BTC-USD", pos_state)
         
@@ -336,32 +328,78 @@ class TestPortfolioWinRate:
         pair = PairConfig(product_id="BTC-USD")
         portfolio_manager.register_pair(pair)
         
-        # Add and close profitable trade
-        pos1 = PositionState(
-            entry_price=Decimal('50000'),
-            qty_filled=Decimal('1'),
-            highest_price_since_entry=Decimal('51000'),
-            current_stop_trigger=Decimal('49000'),
-            current_stop_limit=Decimal('48950'),
-            stop_order_id=None
-        )
-        portfolio_manager.add_position("pos_001", "BTC-USD", pos1)
-        portfolio_manager.close_position("pos_001", Decimal('51000'))
-        
-        # Add and close losing trade
-        pos2 = PositionState(
-            entry_price=Decimal('50000'),
-            qty_filled=Decimal('1'),
-            highest_price_since_entry=Decimal('50000'),
-            current_stop_trigger=Decimal('49000'),
-            current_stop_limit=Decimal('48950'),
-            stop_order_id=None
-        )
-        portfolio_manager.add_position("pos_002", "BTC-USD", pos2)
-        portfolio_manager.close_position("pos_002", Decimal('49000'))
+        # One profitable and one losing trade, closed together
+        portfolio_manager.add_position("pos_001", "BTC-USD", _make_position(P50K, ONE, high=P51K))
+        portfolio_manager.add_position("pos_002", "BTC-USD", _make_position(P50K, ONE))
+        total = portfolio_manager.close_positions([("pos_001", P51K), ("pos_002", P49K)])
         
+        assert total == ZERO
+        assert not portfolio_manager.positions
         metrics = portfolio_manager.get_portfolio_metrics()
         
         assert metrics.closed_positions == 2
         assert metrics.win_rate_pct == Decimal('50')
-        assert metrics.total_pnl == Decimal('0')  # 1000 - 1000
+        assert metrics.total_pnl == ZERO  # 1000 - 1000
+    
+    def test_realized_metrics_accumulate_across_closes(self, portfolio_manager):
+        """Test single and batch closes both feed the realized totals."""
+        portfolio_manager.register_pair(PairConfig(product_id="BTC-USD"))
+        for i in range(3):
+            portfolio_manager.add_position(f"pos_{i:03d}", "BTC-USD", _make_position(P50K, ONE))
+        
+        portfolio_manager.close_position("pos_000", P51K)
+        portfolio_manager.close_positions([("pos_001", P51K), ("pos_002", P48950)])
+        metrics = portfolio_manager.get_portfolio_metrics()
+        
+        assert metrics.realized_pnl == Decimal('950')  # 1000 + 1000 - 1050
+        assert metrics.win_rate_pct == Decimal('200') / 3
+    
+    def test_close_positions_rejects_unknown_id_without_closing(self, portfolio_manager):
+        """Test a batch close with an unknown id leaves every position open."""
+        portfolio_manager.register_pair(PairConfig(product_id="BTC-USD"))
+        portfolio_manager.add_position("pos_001", "BTC-USD", _make_position(P50K, ONE))
+        
+        with pytest.raises(ValueError, match="not found"):
+            portfolio_manager.close_positions([("pos_001", P51K), ("missing", P51K)])
+        
+        assert "pos_001" in portfolio_manager.positions
+        assert portfolio_manager.closed_positions == []
+
+
+class TestMultiPairOrchestrator:
+    """Test entry signal checks across pairs."""
+    
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("max_concurrent", [1, 2])
+    async def test_check_all_entries_caps_in_flight_signals(self, portfolio_config, max_concurrent):
+        """Test max_concurrent bounds in-flight signal calls and errors still map to False."""
+        orchestrator = MultiPairOrchestrator(portfolio_config)
+        product_ids = ["BTC-USD", "ETH-USD", "SOL-USD", "ADA-USD", "DOT-USD"]
+        for product_id in product_ids:
+            # check_all_entries only needs the registered ids, not a live engine
+            orchestrator.register_pair(PairConfig(product_id=product_id), engine=None)
+        
+        in_flight = peak = 0
+        
+        async def signal_generator(product_id):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                await asyncio.sleep(0.01)
+                if product_id == "SOL-USD":
+                    raise RuntimeError("data provider down")
+                return {"should_buy": product_id != "ADA-USD"}
+            finally:
+                in_flight -= 1
+        
+        signals = await orchestrator.check_all_entries(signal_generator, max_concurrent=max_concurrent)
+        
+        assert peak == max_concurrent
+        assert signals == {
+            "BTC-USD": True,
+            "ETH-USD": True,
+            "SOL-USD": False,
+            "ADA-USD": False,
+            "DOT-USD": True,
+        }
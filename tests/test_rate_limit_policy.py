@@ -117,3 +117,38 @@ def test_wait_if_needed_timeout():
     
     assert not allowed
     assert elapsed < 0.2  # didn't wait the full second
+
+
+def test_token_bucket_refills_gradually(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("trading.rate_limit_policy.time.monotonic", lambda: clock[0])
+    state = RateLimitState(quota=RateLimitQuota(requests_per_window=4, window_seconds=1))
+    
+    for _ in range(4):
+        state.record_request()
+    assert not state.is_allowed()
+    assert state.time_until_allowed() == pytest.approx(0.25)
+    
+    # A quarter window later exactly one request's worth has refilled
+    clock[0] += 0.25
+    assert state.is_allowed()
+    state.record_request()
+    assert not state.is_allowed()
+    
+    # Idle time never banks more than one window's burst
+    clock[0] += 10
+    assert state.is_allowed()
+    assert state.tokens == 4
+
+
+def test_unknown_endpoints_get_separate_default_buckets():
+    manager = RateLimitManager(quotas={
+        "/orders": RateLimitQuota(requests_per_window=1, window_seconds=60),
+        "default": RateLimitQuota(requests_per_window=1, window_seconds=60),
+    })
+    assert set(manager.states) == {"/orders"}
+    
+    manager.record_request("/fills")
+    assert not manager.is_allowed("/fills")
+    assert manager.is_allowed("/products")
+    assert manager.is_allowed("/orders")
@@ -84,3 +84,24 @@ def test_credentials_namedtuple():
     )
     assert creds.api_key == "k"
     assert creds.api_secret == "s"
+
+
+def test_config_file_credentials_are_cached_until_rewritten(tmp_path, monkeypatch):
+    """A config file is parsed once; rewriting it is picked up."""
+    monkeypatch.delenv("CB_API_KEY", raising=False)
+    monkeypatch.delenv("CB_API_SECRET", raising=False)
+    load_credentials.cache_clear()
+    
+    config_file = tmp_path / "config.json"
+    save_config(str(config_file), api_key="first_key", api_secret="c2VjcmV0")
+    first = load_credentials(config_path=str(config_file))
+    
+    calls = []
+    real_load = json.load
+    monkeypatch.setattr("trading.secrets.json.load", lambda f: calls.append(f) or real_load(f))
+    assert load_credentials(config_path=str(config_file)) is first
+    assert not calls
+    
+    save_config(str(config_file), api_key="second_key_", api_secret="c2VjcmV0")
+    assert load_credentials(config_path=str(config_file)).api_key == "second_key_"
+    assert len(calls) == 1
@@ -1,5 +1,6 @@
 import asyncio
 import base64
+import functools
 import hashlib
 import hmac
 import json
@@ -11,6 +12,33 @@ from typing import Optional
 import aiohttp
 
 from .execution import ExchangeAdapter
+from .logging_setup import logger
+
+try:
+    import orjson  # type: ignore  # optional: pip install quant-trade[performance]
+except ImportError:
+    orjson = None
+
+# Request bodies are serialized straight to bytes: they are signed and sent as is
+if orjson is not None:
+    _dumpb = orjson.dumps
+    _loads = orjson.loads
+else:
+    def _dumpb(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    _loads = json.loads
+
+
+@functools.lru_cache(maxsize=64)
+def _backoff_cap(attempt: int, base: float, max_backoff: float) -> float:
+    """Deterministic part of the exponential backoff: min(base * 2**attempt, max_backoff)."""
+    # Past 2**30 any sane max_backoff has long been hit; keeps the shift bounded
+    return min(base * (1 << min(attempt, 30)), max_backoff)
+
+
+# Wire form of the HTTP methods the adapter signs (skips .upper().encode() per call)
+_METHOD_BYTES = {"GET": b"GET", "POST": b"POST", "DELETE": b"DELETE", "PUT": b"PUT"}
 
 
 class AsyncCoinbaseAPIError(Exception):
@@ -37,48 +65,57 @@ class AsyncCoinbaseAdapter:
             order_id = await adapter.place_limit_buy(...)
     """
 
-    def __init__(self, api_key: str, secret: str, *, base_url: str = "https://api.exchange.coinbase.com", product_id: str = "BTC-USD", timeout: int = 10, max_backoff_seconds: float = 60.0):
+    def __init__(self, api_key: str, secret: str, *, passphrase: Optional[str] = None, base_url: str = "https://api.exchange.coinbase.com", product_id: str = "BTC-USD", timeout: int = 10, max_backoff_seconds: float = 60.0):
         self.api_key = api_key
         self.secret = secret
+        self.passphrase = passphrase
+        # Per-request headers are this template plus signature and timestamp
+        self._headers_base = {"CB-ACCESS-KEY": api_key, "Content-Type": "application/json"}
+        if passphrase is not None:
+            self._headers_base["CB-ACCESS-PASSPHRASE"] = passphrase
+        # Decode the signing key once rather than on every request
+        try:
+            self._hmac_key = base64.b64decode(secret)
+        except Exception:
+            raise AsyncCoinbaseAPIError("Secret must be base64-encoded for signing")
         self.base_url = base_url.rstrip("/")
         self.product_id = product_id
         self.timeout = timeout
         self.max_backoff_seconds = max_backoff_seconds
+        # Own jitter source, independent of the shared module-level generator
+        self._rng = random.Random()
         self.session: Optional[aiohttp.ClientSession] = None
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        # One exchange host: keep a small pool of warm keep-alive connections
+        # and cache its DNS lookup; the request timeout is set once here
+        connector = aiohttp.TCPConnector(limit=32, limit_per_host=16, ttl_dns_cache=300, keepalive_timeout=75)
+        self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
 
-    def _sign(self, method: str, request_path: str, body: Optional[str]) -> dict:
+    def _sign(self, method: str, request_path: str, body: Optional[bytes]) -> dict:
         timestamp = str(time.time())
-        body = body or ""
-        message = timestamp + method.upper() + request_path + body
-        try:
-            key = base64.b64decode(self.secret)
-        except Exception:
-            raise AsyncCoinbaseAPIError("Secret must be base64-encoded for signing")
-        signature = hmac.new(key, message.encode("utf-8"), hashlib.sha256)
-        signature_b64 = base64.b64encode(signature.digest()).decode()
-        headers = {
-            "CB-ACCESS-KEY": self.api_key,
-            "CB-ACCESS-SIGN": signature_b64,
-            "CB-ACCESS-TIMESTAMP": timestamp,
-            "Content-Type": "application/json",
-        }
+        # Feed the prehash (timestamp + method + path + body) to the HMAC piece
+        # by piece instead of concatenating it into one string first
+        signature = hmac.new(self._hmac_key, timestamp.encode(), hashlib.sha256)
+        signature.update(_METHOD_BYTES.get(method) or method.upper().encode())
+        signature.update(request_path.encode())
+        if body:
+            signature.update(body)
+        headers = self._headers_base.copy()
+        headers["CB-ACCESS-SIGN"] = base64.b64encode(signature.digest()).decode()
+        headers["CB-ACCESS-TIMESTAMP"] = timestamp
         return headers
 
     @staticmethod
-    def _jittered_backoff(attempt: int, base: float = 1.0, max_backoff: float = 60.0) -> float:
-        """Compute jittered exponential backoff."""
-        delay = base * (2 ** attempt)
-        delay = min(delay, max_backoff)
-        jitter = delay * 0.25 * (2 * random.random() - 1)
-        return max(0, delay + jitter)
+    def _jittered_backoff(attempt: int, base: float = 1.0, max_backoff: float = 60.0, rng: Optional[random.Random] = None) -> float:
+        """Compute jittered exponential backoff (±25%), drawing from ``rng`` if given."""
+        delay = _backoff_cap(attempt, base, max_backoff)
+        return max(0.0, delay * (1.0 + 0.25 * (2 * (rng or random).random() - 1)))
 
     @staticmethod
     def _get_rate_limit_reset(headers: dict) -> Optional[float]:
@@ -90,50 +127,63 @@ class AsyncCoinbaseAdapter:
                 return None
         return None
 
-    async def _request(self, method: str, path: str, body: Optional[dict] = None, params: Optional[dict] = None, attempt: int = 0):
-        """Execute a request with async rate-limit backoff and retry."""
+    async def _request(self, method: str, path: str, body: Optional[dict] = None, params: Optional[dict] = None):
+        """Execute a request with async rate-limit backoff and retry.
+
+        Retries loop in place rather than recursing; each attempt is re-signed
+        with a fresh timestamp, and the response is released before sleeping.
+        """
         if not self.session:
             raise AsyncCoinbaseAPIError("Session not initialized; use 'async with' context manager")
 
         request_path = path if path.startswith("/") else f"/{path}"
-        body_str = json.dumps(body) if body is not None else ""
-        headers = self._sign(method, request_path, body_str)
+        body_bytes = _dumpb(body) if body is not None else b""
         url = f"{self.base_url}{request_path}"
 
-        try:
-            async with self.session.request(method, url, headers=headers, data=body_str if body else None, params=params, timeout=aiohttp.ClientTimeout(total=self.timeout)) as resp:
-                # Handle rate limit (429) with async backoff
-                if resp.status == 429:
-                    reset_ts = self._get_rate_limit_reset(resp.headers)
-                    if reset_ts is not None:
-                        # Async sleep until rate limit reset
-                        delay = max(0, reset_ts - time.time())
-                        if delay > 0:
-                            await asyncio.sleep(delay)
-                            return await self._request(method, path, body=body, params=params, attempt=attempt + 1)
-                    else:
-                        # Fallback: jittered exponential backoff
+        attempt = 0
+        while True:
+            headers = self._sign(method, request_path, body_bytes)
+            delay = None
+            try:
+                async with self.session.request(method, url, headers=headers, data=body_bytes if body else None, params=params) as resp:
+                    # Handle rate limit (429) with async backoff
+                    if resp.status == 429:
+                        # Capped on both paths so a misbehaving server can't keep us retrying
                         if attempt >= 5:
                             raise AsyncRateLimitError("Rate limited and max backoff attempts exceeded")
-                        backoff = self._jittered_backoff(attempt, base=1.0, max_backoff=self.max_backoff_seconds)
-                        await asyncio.sleep(backoff)
-                        return await self._request(method, path, body=body, params=params, attempt=attempt + 1)
-
-                # Handle other errors
-                if not (200 <= resp.status < 300):
-                    text = await resp.text()
-                    raise AsyncCoinbaseAPIError(f"{resp.status}: {text}")
-
-                # Parse response
-                text = await resp.text()
-                if text:
-                    return json.loads(text)
-                return None
-
-        except asyncio.TimeoutError as e:
-            raise AsyncCoinbaseAPIError(f"Request timeout: {e}")
-        except aiohttp.ClientError as e:
-            raise AsyncCoinbaseAPIError(f"Request failed: {e}")
+                        reset_ts = self._get_rate_limit_reset(resp.headers)
+                        if reset_ts is not None:
+                            # Async sleep until rate limit reset. The header is Unix
+                            # time, so it is compared with the wall clock, but the
+                            # wait is clamped in case the header (or clock) is off.
+                            delay = min(reset_ts - time.time(), self.max_backoff_seconds)
+                            if delay <= 0:
+                                delay = None
+                        else:
+                            # Fallback: jittered exponential backoff
+                            delay = self._jittered_backoff(attempt, base=1.0, max_backoff=self.max_backoff_seconds, rng=self._rng)
+                        if delay is not None and delay > 1:
+                            logger.debug(f"Rate limited on {method} {request_path}; retrying in {delay:.2f}s")
+
+                    if delay is None:
+                        # Handle other errors
+                        if not (200 <= resp.status < 300):
+                            text = await resp.text()
+                            raise AsyncCoinbaseAPIError(f"{resp.status}: {text}")
+
+                        # Parse response (straight from bytes, no text decode)
+                        raw = await resp.read()
+                        if raw:
+                            return _loads(raw)
+                        return None
+
+            except asyncio.TimeoutError as e:
+                raise AsyncCoinbaseAPIError(f"Request timeout: {e}")
+            except aiohttp.ClientError as e:
+                raise AsyncCoinbaseAPIError(f"Request failed: {e}")
+
+            await asyncio.sleep(delay)
+            attempt += 1
 
     async def place_limit_buy(self, client_id: str, price: Decimal, qty: Decimal, product_id: Optional[str] = None) -> str:
         """Place a limit buy order asynchronously."""
@@ -6,8 +6,10 @@ Demonstrates integration of AsyncExecutionEngine with real async operations:
 - Stop-timeout handler
 """
 import asyncio
+import random
+import sys
 from decimal import Decimal
-from typing import AsyncIterator, Callable, Optional
+from typing import AsyncIterator, Callable, List, Optional
 
 
 class PeriodicReconciler:
@@ -32,21 +34,35 @@ class PeriodicReconciler:
 
 
 class MockTradeListener:
-    """Mock WebSocket-like trade listener that publishes trade prices."""
+    """Mock WebSocket-like trade listener that publishes trade prices.
 
-    def __init__(self, interval_seconds: float = 1.0, initial_price: Decimal = Decimal('50000')):
+    With ``pregenerate=N`` the random walk is computed once up front and the
+    stream yields those N prices and then ends (handy for fast, bounded tests).
+    """
+
+    def __init__(self, interval_seconds: float = 1.0, initial_price: Decimal = Decimal('50000'), pregenerate: int = 0):
         self.interval = interval_seconds
         self.price = initial_price
         self.price_delta = Decimal('10')  # price change per event
+        self._prices: Optional[List[Decimal]] = None
+        if pregenerate:
+            self._prices = [self._step() for _ in range(pregenerate)]
+
+    def _step(self) -> Decimal:
+        # Simulate price movement (up/down randomly)
+        delta = self.price_delta if random.random() > 0.5 else -self.price_delta
+        self.price = max(Decimal('0'), self.price + delta)
+        return self.price
 
     async def stream_trades(self) -> AsyncIterator[Decimal]:
         """Yield simulated trade prices."""
+        if self._prices is not None:
+            for price in self._prices:
+                yield price
+                await asyncio.sleep(self.interval)
+            return
         while True:
-            # Simulate price movement (up/down randomly)
-            import random
-            delta = self.price_delta if random.random() > 0.5 else -self.price_delta
-            self.price = max(Decimal('0'), self.price + delta)
-            yield self.price
+            yield self._step()
             await asyncio.sleep(self.interval)
 
 
@@ -58,8 +74,10 @@ class EventLoopRunner:
         engine,
         reconciler: Optional[PeriodicReconciler] = None,
         trade_listener: Optional[MockTradeListener] = None,
+        trade_queue_size: int = 1024,
     ):
         self.engine = engine
+        self.trade_queue_size = trade_queue_size
         self.reconciler = reconciler or PeriodicReconciler(interval_seconds=30.0)
         self.trade_listener = trade_listener or MockTradeListener(interval_seconds=2.0)
         self._stop_event = asyncio.Event()
@@ -75,13 +93,31 @@ class EventLoopRunner:
         # Initialize engine
         await self.engine.startup_reconcile()
 
-        # Run concurrent tasks
-        await asyncio.gather(
-            self._reconcile_loop(),
-            self._trade_listener_loop(),
-            self._stop_timeout_loop(),
-            return_exceptions=False,
-        )
+        # Run concurrent tasks; stop() cancels them, and a failure in one
+        # cancels the others instead of leaving them running
+        loops = (self._reconcile_loop, self._trade_listener_loop, self._stop_timeout_loop)
+        if sys.version_info >= (3, 11):
+            async with asyncio.TaskGroup() as tg:
+                tasks = [tg.create_task(loop()) for loop in loops]
+                tg.create_task(self._cancel_on_stop(tasks))
+            return
+
+        tasks = [asyncio.ensure_future(loop()) for loop in loops]
+        stopper = asyncio.ensure_future(self._cancel_on_stop(tasks))
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        finally:
+            for task in (*tasks, stopper):
+                task.cancel()
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+
+    async def _cancel_on_stop(self, tasks) -> None:
+        """Cancel ``tasks`` once stop() is called (wakes loops blocked in sleep)."""
+        await self._stop_event.wait()
+        for task in tasks:
+            task.cancel()
 
     async def stop(self):
         """Signal the event loop to stop."""
@@ -96,13 +132,37 @@ class EventLoopRunner:
         except asyncio.CancelledError:
             pass
 
-    async def _trade_listener_loop(self):
-        """Listen to trade prices and update trailing stops."""
+    async def _read_trades(self, queue: asyncio.Queue) -> None:
+        """Feed the trade stream into ``queue``; ``None`` marks its end."""
         async for price in self.trade_listener.stream_trades():
-            if self._stop_event.is_set():
-                break
-            # Update trailing stop based on latest trade
-            await self.engine.on_trade(last_trade_price=price)
+            await queue.put(price)
+        await queue.put(None)
+
+    async def _trade_listener_loop(self):
+        """Listen to trade prices and update trailing stops.
+
+        A reader task queues ticks as they arrive. Ticks that pile up while the
+        engine is busy are coalesced into one update at their highest price:
+        the trailing stop only ever ratchets on the maximum seen.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.trade_queue_size)
+        reader = asyncio.create_task(self._read_trades(queue))
+        try:
+            ended = False
+            while not ended and not self._stop_event.is_set():
+                price = await queue.get()
+                if price is None:
+                    break
+                while not queue.empty():
+                    pending = queue.get_nowait()
+                    if pending is None:
+                        ended = True
+                        break
+                    price = max(price, pending)
+                # Update trailing stop based on the batch's highest trade
+                await self.engine.on_trade(last_trade_price=price)
+        finally:
+            reader.cancel()
 
     async def _stop_timeout_loop(self):
         """Periodically check for stop-timeout conditions.
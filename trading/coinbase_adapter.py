@@ -42,13 +42,20 @@ class CoinbaseAdapter(ExchangeAdapter):
     def __init__(self, api_key: str, secret: str, *, base_url: str = "https://api.exchange.coinbase.com", product_id: str = "BTC-USD", timeout: int = 10, max_retries: int = 5, max_backoff_seconds: float = 60.0):
         self.api_key = api_key
         self.secret = secret
+        # Decode the signing key once rather than on every request
+        try:
+            self._hmac_key = base64.b64decode(secret)
+        except Exception:
+            raise CoinbaseAPIError("Secret must be base64-encoded for signing")
         self.base_url = base_url.rstrip("/")
         self.product_id = product_id
         self.timeout = timeout
         self.max_backoff_seconds = max_backoff_seconds
 
         self.session = requests.Session()
-        retries = Retry(total=max_retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=frozenset(["GET", "POST", "DELETE", "PUT"]))
+        # 429 is left to _request, which honours CB-RateLimit-Reset; urllib3
+        # would otherwise retry it blindly and raise before the adapter sees it.
+        retries = Retry(total=max_retries, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504), allowed_methods=frozenset(["GET", "POST", "DELETE", "PUT"]))
         self.session.mount("https://", HTTPAdapter(max_retries=retries))
         self.session.mount("http://", HTTPAdapter(max_retries=retries))
 
@@ -65,11 +72,7 @@ class CoinbaseAdapter(ExchangeAdapter):
         timestamp = str(time.time())
         body = body or ""
         message = timestamp + method.upper() + request_path + body
-        try:
-            key = base64.b64decode(self.secret)
-        except Exception:
-            raise CoinbaseAPIError("Secret must be base64-encoded for signing")
-        signature = hmac.new(key, message.encode("utf-8"), hashlib.sha256)
+        signature = hmac.new(self._hmac_key, message.encode("utf-8"), hashlib.sha256)
         signature_b64 = base64.b64encode(signature.digest()).decode()
         headers = {
             "CB-ACCESS-KEY": self.api_key,
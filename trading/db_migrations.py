@@ -62,15 +62,37 @@ def _migration_2_down(conn):
     conn.commit()
 
 
+def _migration_3(conn):
+    """Add a composite index for per-position order lookups filtered by state and type.
+
+    ``type`` lives inside the JSON ``value`` column, so it is indexed as an expression.
+    """
+    cur = conn.cursor()
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_orders_pos_state_type "
+        "ON orders(position_id, state, json_extract(value, '$.type'))"
+    )
+    conn.commit()
+
+
+def _migration_3_down(conn):
+    """Drop the composite order index."""
+    cur = conn.cursor()
+    cur.execute("DROP INDEX IF EXISTS idx_orders_pos_state_type")
+    conn.commit()
+
+
 MIGRATIONS: Dict[int, Callable] = {
     1: _migration_1,
     2: _migration_2,
+    3: _migration_3,
 }
 
 # Optional down migrations
 MIGRATION_DOWNS: Dict[int, Callable] = {
     1: _migration_1_down,
     2: _migration_2_down,
+    3: _migration_3_down,
 }
 
 
@@ -1,11 +1,30 @@
 import json
 import sqlite3
+import threading
+from contextlib import contextmanager
 from decimal import Decimal
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 from .position import PositionState
 
+try:
+    import orjson  # type: ignore  # optional: pip install quant-trade[performance]
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # Stored as TEXT (not bytes) so json_extract() in queries keeps working
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    _loads = orjson.loads
+else:
+    _dumps = json.dumps
+    _loads = json.loads
+
 
 class SQLitePersistence:
     """SQLite-backed persistence supporting multiple positions and order history.
@@ -15,18 +34,97 @@ class SQLitePersistence:
 
     New APIs:
     - `save_position(pos, position_id)` / `load_position(position_id)`
-    - `list_positions()`
+    - `list_positions()` / `load_all_positions()`
     - `save_order(order_id, position_id, order_dict, state)`
-    - `get_order(order_id)` / `list_orders(position_id)`
+    - `get_order(order_id)` / `list_orders(position_id)` / `list_all_orders()`
+    - `update_order_state(order_id, state)`
+    - `save_positions_bulk(items)` / `save_orders_bulk(rows)` (one transaction per batch)
+    - `transaction()` to group several writes into one atomic commit
+    - `trade_pairs()` for each filled entry with its position's first filled exit
 
-    All writes use transactions for atomicity.
+    All writes use transactions for atomicity. The connection may be shared by
+    several async engines (each running persistence calls via
+    ``asyncio.to_thread``), so writes are serialized on an instance lock to keep
+    their transactions from interleaving on the one warm connection.
     """
 
-    def __init__(self, path: Path):
-        self.path = path
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+    # Fixed statement text (values are always bound) so sqlite3's per-connection
+    # statement cache compiles each one once; single and bulk saves share them.
+    _SAVE_POSITION_SQL = (
+        "INSERT OR REPLACE INTO positions(position_id, value, updated_at) "
+        "VALUES(?, ?, strftime('%s','now'))"
+    )
+    # The legacy kv row is kept in step with positions for backward compatibility
+    _SAVE_KV_SQL = "INSERT OR REPLACE INTO kv(key, value, updated_at) VALUES(?, ?, strftime('%s','now'))"
+    # created_at survives a replace; the order_id is bound a second time for that lookup
+    _SAVE_ORDER_SQL = (
+        "INSERT OR REPLACE INTO orders(order_id, position_id, value, state, created_at, updated_at) "
+        "VALUES(?, ?, ?, ?, COALESCE((SELECT created_at FROM orders WHERE order_id = ?), strftime('%s','now')), "
+        "strftime('%s','now'))"
+    )
+    # Each filled entry of a known position paired with that position's first
+    # filled exit (NULLs when it has none). Prices and quantities come back as
+    # the stored strings so callers can price them in Decimal.
+    _TRADE_PAIRS_SQL = """
+        WITH fills AS (
+            SELECT o.rowid AS seq, o.position_id,
+                   json_extract(o.value, '$.type') AS type,
+                   json_extract(o.value, '$.price') AS price,
+                   json_extract(o.value, '$.qty') AS qty
+            FROM orders o
+            JOIN positions p ON p.position_id = o.position_id
+            WHERE o.state = 'filled'
+        ),
+        first_exit AS (
+            SELECT f.position_id, f.price, f.qty FROM fills f
+            WHERE f.seq = (SELECT MIN(seq) FROM fills x
+                           WHERE x.position_id = f.position_id AND x.type IN ('exit', 'force_sell'))
+        )
+        SELECT e.price, e.qty, x.price, x.qty
+        FROM fills e
+        LEFT JOIN first_exit x ON x.position_id = e.position_id
+        WHERE e.type = 'entry'
+        ORDER BY e.seq
+    """
+
+    def __init__(self, path: Union[Path, str], create: bool = True):
+        """Open (and by default create) the database at ``path``.
+
+        With ``create=False`` a missing file raises ``FileNotFoundError`` instead
+        of being created, checked atomically by SQLite itself at open time.
+        ``":memory:"`` opens a private in-memory database (``create`` is ignored).
+        """
+        if str(path) == ":memory:":
+            self.path = ":memory:"
+            target, uri = self.path, False
+        elif create:
+            self.path = Path(path)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            target, uri = str(self.path), False
+        else:
+            self.path = Path(path)
+            target, uri = self.path.resolve().as_uri() + "?mode=rw", True
+        # isolation_level=None: transactions are driven explicitly via transaction()
+        try:
+            self.conn = sqlite3.connect(target, timeout=30, check_same_thread=False, isolation_level=None, uri=uri)
+        except sqlite3.OperationalError as e:
+            if create:
+                raise
+            raise FileNotFoundError(f"Database not found: {self.path}") from e
         self.conn.row_factory = sqlite3.Row
+        # WAL lets the reporting CLIs read while the trading writer commits;
+        # mmap serves warm pages without read() syscalls. In-memory databases
+        # have no journal file to switch. (timeout=30 above is the busy timeout.)
+        if self.path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            # SQLite's default, pinned: checkpoints stay small and incremental
+            self.conn.execute("PRAGMA wal_autocheckpoint=1000")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-64000")
+        self.conn.execute("PRAGMA mmap_size=268435456")
+        self._lock = threading.RLock()
+        self._tx_depth = 0
         self._init_db()
 
     def _init_db(self):
@@ -35,29 +133,63 @@ class SQLitePersistence:
 
         apply_migrations(self.conn)
 
+    @contextmanager
+    def transaction(self):
+        """Run the enclosed writes in a single ``BEGIN IMMEDIATE`` transaction.
+
+        Nested calls (including the ones made by the ``save_*`` methods) join
+        the outermost transaction, so only it commits or rolls back.
+        """
+        with self._lock:
+            if self._tx_depth:
+                self._tx_depth += 1
+                try:
+                    yield self.conn
+                finally:
+                    self._tx_depth -= 1
+                return
+
+            self.conn.execute("BEGIN IMMEDIATE")
+            self._tx_depth = 1
+            try:
+                yield self.conn
+            except BaseException:
+                self._tx_depth = 0
+                self.conn.rollback()
+                raise
+            self._tx_depth = 0
+            self.conn.commit()
+
     # --- Position APIs ---
     def save_position(self, pos: PositionState, position_id: str = "position") -> None:
-        data = json.dumps(pos.to_dict())
-        cur = self.conn.cursor()
-        cur.execute("BEGIN IMMEDIATE")
-        cur.execute("INSERT OR REPLACE INTO positions(position_id, value, updated_at) VALUES(?, ?, strftime('%s','now'))", (position_id, data))
-        # also write legacy kv for backward compatibility
-        cur.execute("INSERT OR REPLACE INTO kv(key, value, updated_at) VALUES(?, ?, strftime('%s','now'))", (position_id, data))
-        self.conn.commit()
+        data = _dumps(pos.to_dict())
+        with self.transaction():
+            cur = self.conn.cursor()
+            cur.execute(self._SAVE_POSITION_SQL, (position_id, data))
+            # also write legacy kv for backward compatibility
+            cur.execute(self._SAVE_KV_SQL, (position_id, data))
+
+    def save_positions_bulk(self, items: Iterable[Tuple[str, PositionState]]) -> None:
+        """Save many ``(position_id, pos)`` pairs in a single transaction."""
+        rows = [(position_id, _dumps(pos.to_dict())) for position_id, pos in items]
+        with self.transaction():
+            cur = self.conn.cursor()
+            cur.executemany(self._SAVE_POSITION_SQL, rows)
+            cur.executemany(self._SAVE_KV_SQL, rows)
 
     def load_position(self, position_id: str = "position") -> Optional[PositionState]:
         cur = self.conn.cursor()
         cur.execute("SELECT value FROM positions WHERE position_id = ?", (position_id,))
         row = cur.fetchone()
         if row:
-            d = json.loads(row[0])
+            d = _loads(row[0])
             return PositionState.from_dict(d)
         # fallback to legacy kv
         cur.execute("SELECT value FROM kv WHERE key = ?", (position_id,))
         row = cur.fetchone()
         if not row:
             return None
-        d = json.loads(row[0])
+        d = _loads(row[0])
         return PositionState.from_dict(d)
 
     def list_positions(self) -> List[str]:
@@ -65,16 +197,41 @@ class SQLitePersistence:
         cur.execute("SELECT position_id FROM positions")
         return [r[0] for r in cur.fetchall()]
 
+    def load_all_positions(self) -> Dict[str, PositionState]:
+        """Load every position in one query, keyed by position_id (sorted by id)."""
+        cur = self.conn.cursor()
+        cur.execute("SELECT position_id, value FROM positions ORDER BY position_id")
+        return {row[0]: PositionState.from_dict(_loads(row[1])) for row in cur.fetchall()}
+
     # --- Order APIs ---
     def save_order(self, order_id: str, position_id: Optional[str], order_dict: Dict, state: Optional[str] = None) -> None:
-        data = json.dumps(order_dict)
-        cur = self.conn.cursor()
-        cur.execute("BEGIN IMMEDIATE")
-        cur.execute(
-            "INSERT OR REPLACE INTO orders(order_id, position_id, value, state, created_at, updated_at) VALUES(?, ?, ?, ?, COALESCE((SELECT created_at FROM orders WHERE order_id = ?), strftime('%s','now')), strftime('%s','now'))",
-            (order_id, position_id, data, state, order_id),
-        )
-        self.conn.commit()
+        data = _dumps(order_dict)
+        with self.transaction():
+            cur = self.conn.cursor()
+            cur.execute(self._SAVE_ORDER_SQL, (order_id, position_id, data, state, order_id))
+
+    def save_orders_bulk(self, rows: Iterable[Tuple[str, Optional[str], Dict, Optional[str]]]) -> None:
+        """Save many orders in a single transaction.
+
+        Each row has the same shape as the ``save_order`` arguments:
+        ``(order_id, position_id, order_dict, state)``.
+        """
+        params = [
+            (order_id, position_id, _dumps(order_dict), state, order_id)
+            for order_id, position_id, order_dict, state in rows
+        ]
+        with self.transaction():
+            cur = self.conn.cursor()
+            cur.executemany(self._SAVE_ORDER_SQL, params)
+
+    def update_order_state(self, order_id: str, state: str) -> bool:
+        """Set the state of an existing order. Returns False if it does not exist."""
+        with self.transaction():
+            cur = self.conn.execute(
+                "UPDATE orders SET state = ?, updated_at = strftime('%s','now') WHERE order_id = ?",
+                (state, order_id),
+            )
+        return cur.rowcount > 0
 
     def get_order(self, order_id: str) -> Optional[Dict]:
         cur = self.conn.cursor()
@@ -82,20 +239,78 @@ class SQLitePersistence:
         row = cur.fetchone()
         if not row:
             return None
-        return {"order_id": row[0], "position_id": row[1], **json.loads(row[2]), "state": row[3]}
+        return {"order_id": row[0], "position_id": row[1], **_loads(row[2]), "state": row[3]}
+
+    def list_orders(self, position_id: str, state: Optional[str] = None, types: Optional[Iterable[str]] = None) -> List[Dict]:
+        """List a position's orders, optionally filtered by state and order type.
 
-    def list_orders(self, position_id: str) -> List[Dict]:
+        The filters match the (position_id, state, type) index from migration 3.
+        """
+        sql = "SELECT order_id, value, state FROM orders WHERE position_id = ?"
+        params: List = [position_id]
+        if state is not None:
+            sql += " AND state = ?"
+            params.append(state)
+        if types is not None:
+            types = list(types)
+            sql += f" AND json_extract(value, '$.type') IN ({', '.join('?' * len(types))})"
+            params.extend(types)
         cur = self.conn.cursor()
-        cur.execute("SELECT order_id, value, state FROM orders WHERE position_id = ?", (position_id,))
+        cur.execute(sql, params)
         out = []
-        for row in cur.fetchall():
-            data = json.loads(row[1])
-            data.update({"order_id": row[0], "state": row[2]})
+        # Rows are sqlite3.Row; read columns by name straight into the decoded payload
+        for row in cur:
+            data = _loads(row["value"])
+            data["order_id"] = row["order_id"]
+            data["state"] = row["state"]
             out.append(data)
         return out
 
+    def list_all_orders_with_positions(self) -> List[Dict]:
+        """Return every order attached to a known position in a single query.
+
+        Rows are ordered by ``position_id`` (then insertion order) so callers can
+        group them with ``itertools.groupby``. Each dict carries ``position_id``
+        alongside the usual ``list_orders`` fields.
+        """
+        cur = self.conn.cursor()
+        cur.execute(
+            "SELECT o.position_id, o.order_id, o.value, o.state FROM orders o "
+            "JOIN positions p ON p.position_id = o.position_id "
+            "ORDER BY o.position_id, o.rowid"
+        )
+        out = []
+        for row in cur:
+            data = _loads(row["value"])
+            data["position_id"] = row["position_id"]
+            data["order_id"] = row["order_id"]
+            data["state"] = row["state"]
+            out.append(data)
+        return out
+
+    def list_all_orders(self) -> Dict[str, List[Dict]]:
+        """Return ``{position_id: [order, ...]}`` for all known positions in one query.
+
+        Positions without orders are omitted; use ``.get(position_id, [])``.
+        """
+        rows = self.list_all_orders_with_positions()
+        return {pos_id: list(orders) for pos_id, orders in groupby(rows, key=itemgetter("position_id"))}
+
+    def trade_pairs(self) -> List[Tuple]:
+        """Return ``(entry_price, entry_qty, exit_price, exit_qty)`` for every filled entry.
+
+        Each entry is paired with the first filled exit of its position in one
+        query; the exit fields are None while the position has none. Values
+        are returned as stored (strings), not converted.
+        """
+        return [tuple(row) for row in self.conn.execute(self._TRADE_PAIRS_SQL)]
+
     def close(self):
         try:
+            if self.path != ":memory:":
+                # Fold the WAL back without waiting on readers (PASSIVE never
+                # blocks, unlike FULL); the next open starts from a short log
+                self.conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
             self.conn.close()
         except Exception:
             pass
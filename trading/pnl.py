@@ -105,13 +105,23 @@ def aggregate_pnl(analyses: List[TradeAnalysis]) -> dict:
             "avg_pnl_percent": Decimal('0'),
         }
     
-    total_realized = sum(a.realized_pnl for a in analyses)
-    total_unrealized = sum((a.unrealized_pnl or Decimal('0')) for a in analyses)
+    # Single pass over the trades instead of one generator/list per statistic
+    total_realized = Decimal('0')
+    total_unrealized = Decimal('0')
+    total_pnl_pct = Decimal('0')
+    wins = losses = 0
+    for a in analyses:
+        realized = a.realized_pnl
+        total_realized += realized
+        if a.unrealized_pnl:
+            total_unrealized += a.unrealized_pnl
+        total_pnl_pct += a.pnl_percent
+        if realized > 0:
+            wins += 1
+        elif realized < 0:
+            losses += 1
     
-    wins = len([a for a in analyses if a.realized_pnl > 0])
-    losses = len([a for a in analyses if a.realized_pnl < 0])
-    
-    avg_pnl = sum(a.pnl_percent for a in analyses) / len(analyses) if analyses else Decimal('0')
+    avg_pnl = total_pnl_pct / len(analyses)
     
     return {
         "total_trades": len(analyses),
@@ -1,12 +1,17 @@
 """Portfolio manager for multi-pair trading orchestration and risk management."""
+import sys
 from dataclasses import dataclass, field
 from decimal import Decimal
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from .position import PositionState
 
+# Configs are immutable value objects; slots where supported (Python 3.10+).
+# Change one with dataclasses.replace(config, field=value).
+_FROZEN = {"frozen": True, "slots": True} if sys.version_info >= (3, 10) else {"frozen": True}
 
-@dataclass
+
+@dataclass(**_FROZEN)
 class PortfolioConfig:
     """Portfolio-level configuration."""
     total_capital: Decimal
@@ -17,7 +22,7 @@ class PortfolioConfig:
     emergency_liquidation_loss_pct: Decimal = Decimal('-10')  # Auto-liquidate at -10%
 
 
-@dataclass
+@dataclass(**_FROZEN)
 class PairConfig:
     """Per-pair configuration."""
     product_id: str  # e.g., "BTC-USD", "ETH-USD"
@@ -27,6 +32,15 @@ class PairConfig:
     entry_confirmation_level: int = 2  # Need 2/3 indicators
     max_entry_wait_minutes: int = 5
     correlation_group: Optional[str] = None  # e.g., "large_cap", "alts"
+    
+    # Derived from trail_pct once at construction: stop = price * mult
+    trigger_mult: Decimal = field(init=False, repr=False, compare=False)
+    stop_limit_mult: Decimal = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Frozen: set the derived fields through object.__setattr__
+        object.__setattr__(self, "trigger_mult", 1 - self.trail_pct)
+        object.__setattr__(self, "stop_limit_mult", 1 - self.trail_pct * Decimal('1.01'))
 
 
 @dataclass
@@ -73,6 +87,10 @@ class PortfolioManager:
         self.pair_configs: Dict[str, PairConfig] = {}
         self.positions: Dict[str, PortfolioPosition] = {}
         self.closed_positions: List[PortfolioPosition] = []
+        # Running totals over closed_positions, kept by the close methods so
+        # metrics don't rescan the closed history on every call
+        self._realized_pnl = Decimal('0')
+        self._closed_wins = 0
         
     def register_pair(self, pair_config: PairConfig) -> None:
         """Register a new trading pair."""
@@ -135,12 +153,49 @@ class PortfolioManager:
             raise ValueError(f"Position {position_id} not found")
         
         pos = self.positions.pop(position_id)
+        realized_pnl = self._settle(pos, exit_price)
+        
+        self.closed_positions.append(pos)
+        self._realized_pnl += realized_pnl
+        self._closed_wins += realized_pnl > 0
+        return realized_pnl
+    
+    def close_positions(self, closes: Iterable[Tuple[str, Decimal]]) -> Decimal:
+        """Close several ``(position_id, exit_price)`` pairs in one pass.
+
+        All ids are checked before any position is touched, so an unknown or
+        repeated id leaves the portfolio unchanged. Returns the total realized P&L.
+        """
+        closes = list(closes)
+        ids = [position_id for position_id, _ in closes]
+        missing = [position_id for position_id in ids if position_id not in self.positions]
+        if missing:
+            raise ValueError(f"Position {missing[0]} not found")
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate position ids in close batch")
+        
+        total = Decimal('0')
+        wins = 0
+        closed = []
+        for position_id, exit_price in closes:
+            pos = self.positions.pop(position_id)
+            realized_pnl = self._settle(pos, exit_price)
+            total += realized_pnl
+            wins += realized_pnl > 0
+            closed.append(pos)
+        
+        self.closed_positions.extend(closed)
+        self._realized_pnl += total
+        self._closed_wins += wins
+        return total
+    
+    @staticmethod
+    def _settle(pos: PortfolioPosition, exit_price: Decimal) -> Decimal:
+        """Mark ``pos`` closed at ``exit_price`` and return its realized P&L."""
         realized_pnl = (exit_price - pos.state.entry_price) * pos.state.qty_filled
         pos.state.qty_filled = Decimal('0')
         pos.status = "closed"
         pos.current_pnl = realized_pnl
-        
-        self.closed_positions.append(pos)
         return realized_pnl
     
     def get_portfolio_metrics(self) -> PortfolioMetrics:
@@ -152,7 +207,7 @@ class PortfolioManager:
         )
         
         unrealized = sum(pos.current_pnl for pos in self.positions.values())
-        realized = sum(pos.current_pnl for pos in self.closed_positions)
+        realized = self._realized_pnl
         total_pnl = realized + unrealized
         
         total_return = (total_pnl / self.config.total_capital * 100) if self.config.total_capital > 0 else Decimal('0')
@@ -166,9 +221,8 @@ class PortfolioManager:
         concentration = (top_3_sum / self.config.total_capital * 100) if self.config.total_capital > 0 else Decimal('0')
         
         # Win rate across closed positions
-        wins = len([p for p in self.closed_positions if p.current_pnl > 0])
         total_closed = len(self.closed_positions)
-        win_rate = (Decimal(wins) / Decimal(total_closed) * 100) if total_closed > 0 else Decimal('0')
+        win_rate = (Decimal(self._closed_wins) / Decimal(total_closed) * 100) if total_closed > 0 else Decimal('0')
         
         return PortfolioMetrics(
             total_capital=self.config.total_capital,
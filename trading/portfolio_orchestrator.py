@@ -22,24 +22,38 @@ class MultiPairOrchestrator:
         self.portfolio_manager.register_pair(pair_config)
         self.engines[pair_config.product_id] = engine
     
-    async def check_all_entries(self, signal_generator: Callable) -> Dict[str, bool]:
+    async def check_all_entries(
+        self,
+        signal_generator: Callable,
+        max_concurrent: Optional[int] = None
+    ) -> Dict[str, bool]:
         """Check entry signals across all pairs simultaneously.
         
         Args:
             signal_generator: Async callable that takes product_id and returns (should_buy, signal_data)
+            max_concurrent: Optional cap on in-flight signal calls (e.g. to respect
+                a data provider's rate limit). Unbounded when None.
         
         Returns:
             Dict mapping product_id to entry_triggered (True/False)
         """
-        tasks = [
-            signal_generator(product_id)
-            for product_id in self.engines.keys()
-        ]
+        product_ids = list(self.engines)
+        
+        if max_concurrent:
+            semaphore = asyncio.Semaphore(max_concurrent)
+            
+            async def bounded(product_id: str):
+                async with semaphore:
+                    return await signal_generator(product_id)
+            
+            tasks = [bounded(product_id) for product_id in product_ids]
+        else:
+            tasks = [signal_generator(product_id) for product_id in product_ids]
         
         results = await asyncio.gather(*tasks, return_exceptions=True)
         entry_signals = {}
         
-        for product_id, result in zip(self.engines.keys(), results):
+        for product_id, result in zip(product_ids, results):
             if isinstance(result, Exception):
                 entry_signals[product_id] = False
             else:
@@ -75,7 +89,7 @@ class MultiPairOrchestrator:
                 position_id = f"{product_id}_{len(self.portfolio_manager.positions)}"
                 
                 order_id = await engine.submit_entry(
-                    position_id=position_id,
+                    client_id=position_id,
                     price=entry_params['price'],
                     qty=entry_params['qty']
                 )
@@ -25,14 +25,18 @@ Examples:
     Trigger: 49980, Limit: 49745.1
 """
 
+import sys
 from dataclasses import dataclass
 from decimal import Decimal, getcontext
 from typing import Dict, Optional, Tuple
 
 getcontext().prec = 28
 
+# dataclass(slots=True) needs Python 3.10+; on 3.9 instances keep a __dict__
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_SLOTS)
 class PositionState:
     """Tracks an active position with trailing stop logic.
 
@@ -1,4 +1,4 @@
-"""Rate-limit policy: enforce request quotas per endpoint with sliding window."""
+"""Rate-limit policy: enforce request quotas per endpoint with a token bucket."""
 import time
 from dataclasses import dataclass, field
 from typing import Dict, Optional
@@ -9,44 +9,53 @@ class RateLimitQuota:
     """Per-endpoint rate-limit quota."""
     requests_per_window: int  # max requests allowed in the window
     window_seconds: int       # time window in seconds
+    
+    @property
+    def capacity(self) -> float:
+        """Largest burst allowed: a full window's worth of requests."""
+        return float(self.requests_per_window)
+    
+    @property
+    def rate(self) -> float:
+        """Sustained requests per second."""
+        return self.requests_per_window / self.window_seconds
 
 
 @dataclass
 class RateLimitState:
-    """Track request history for a single endpoint."""
+    """Token bucket for a single endpoint.
+    
+    The bucket starts full and refills continuously at the quota's rate, so
+    state is two floats and every call is O(1); unlike a fixed window there
+    is no double burst across a window edge. Uses the monotonic clock.
+    """
     quota: RateLimitQuota
-    request_times: list = field(default_factory=list)  # list of timestamps
+    tokens: float = field(init=False)
+    last_refill: float = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        self.tokens = self.quota.capacity
+        self.last_refill = time.monotonic()
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.quota.capacity, self.tokens + (now - self.last_refill) * self.quota.rate)
+        self.last_refill = now
     
     def is_allowed(self) -> bool:
         """Check if a new request is allowed under the quota."""
-        now = time.time()
-        # Remove requests outside the current window
-        cutoff = now - self.quota.window_seconds
-        self.request_times = [t for t in self.request_times if t > cutoff]
-        
-        # Check if we have capacity
-        return len(self.request_times) < self.quota.requests_per_window
+        self._refill()
+        return self.tokens >= 1.0
     
     def record_request(self) -> None:
         """Record a successful request."""
-        self.request_times.append(time.time())
+        self._refill()
+        self.tokens -= 1.0
     
     def time_until_allowed(self) -> float:
         """Return seconds until next request is allowed. 0 if allowed now."""
-        if self.is_allowed():
-            return 0.0
-        
-        # Find oldest request in the window and return time until it expires
-        now = time.time()
-        cutoff = now - self.quota.window_seconds
-        old_requests = [t for t in self.request_times if t <= cutoff]
-        
-        if not old_requests:
-            # All requests in window; next allowed at oldest request + window
-            oldest = min(self.request_times)
-            return max(0, oldest + self.quota.window_seconds - now)
-        
-        return 0.0
+        self._refill()
+        return max(0.0, (1.0 - self.tokens) / self.quota.rate)
 
 
 class RateLimitManager:
@@ -61,14 +70,21 @@ class RateLimitManager:
     
     def __init__(self, quotas: Optional[Dict[str, RateLimitQuota]] = None):
         self.quotas = quotas or self.DEFAULT_QUOTAS.copy()
-        self.states: Dict[str, RateLimitState] = {}
+        # Buckets for the configured endpoints exist up front; any other
+        # endpoint gets its own "default" bucket on first use
+        self.states: Dict[str, RateLimitState] = {
+            endpoint: RateLimitState(quota=quota)
+            for endpoint, quota in self.quotas.items()
+            if endpoint != "default"
+        }
     
     def _get_state(self, endpoint: str) -> RateLimitState:
-        """Get or create rate-limit state for endpoint."""
-        if endpoint not in self.states:
+        """Get or create rate-limit state for endpoint (one dict probe when known)."""
+        state = self.states.get(endpoint)
+        if state is None:
             quota = self.quotas.get(endpoint, self.quotas.get("default"))
-            self.states[endpoint] = RateLimitState(quota=quota)
-        return self.states[endpoint]
+            state = self.states[endpoint] = RateLimitState(quota=quota)
+        return state
     
     def is_allowed(self, endpoint: str) -> bool:
         """Check if a request to endpoint is allowed."""
@@ -95,14 +111,15 @@ class RateLimitManager:
         Returns:
             True if allowed (or waited successfully), False if timeout
         """
-        start = time.time()
-        while not self.is_allowed(endpoint):
-            wait_time = self.time_until_allowed(endpoint)
+        state = self._get_state(endpoint)
+        start = time.monotonic()
+        while not state.is_allowed():
+            wait_time = state.time_until_allowed()
             if wait_time > 0:
-                elapsed = time.time() - start
+                elapsed = time.monotonic() - start
                 if elapsed + wait_time > max_wait:
                     return False
                 time.sleep(min(wait_time, max_wait - elapsed))
         
-        self.record_request(endpoint)
+        state.record_request()
         return True
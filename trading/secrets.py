@@ -4,6 +4,7 @@ Priority order:
 1. Environment variables: CB_API_KEY, CB_API_SECRET
 2. Config file: ~/.coinbase_config.json or custom path via ENV CB_CONFIG_PATH
 """
+import functools
 import json
 import os
 from pathlib import Path
@@ -15,6 +16,39 @@ class CoinbaseCredentials(NamedTuple):
     api_secret: str
 
 
+def _missing_credentials(config_path: str) -> ValueError:
+    return ValueError(
+        "Missing Coinbase credentials. Provide via:\n"
+        "  - Environment: CB_API_KEY, CB_API_SECRET\n"
+        f"  - Config file: {config_path}\n"
+        "  - CB_CONFIG_PATH env var to override config location"
+    )
+
+
+# Keyed by everything that feeds the result: the env values merged with the
+# file, its path, mtime and size. A changed env var or a rewritten file
+# therefore misses and is re-read; failures raise and are not cached.
+@functools.lru_cache(maxsize=8)
+def _load_from_file(
+    config_path: str,
+    mtime_ns: int,
+    size: int,
+    api_key: Optional[str],
+    api_secret: Optional[str],
+) -> CoinbaseCredentials:
+    try:
+        with open(config_path, "r") as f:
+            cfg = json.load(f)
+        api_key = cfg.get("api_key") or api_key
+        api_secret = cfg.get("api_secret") or api_secret
+    except Exception as e:
+        raise ValueError(f"Failed to load config from {config_path}: {e}")
+    
+    if not api_key or not api_secret:
+        raise _missing_credentials(config_path)
+    return CoinbaseCredentials(api_key=api_key, api_secret=api_secret)
+
+
 def load_credentials(
     config_path: Optional[str] = None,
 ) -> CoinbaseCredentials:
@@ -25,7 +59,9 @@ def load_credentials(
                      checks CB_CONFIG_PATH env var, then ~/.coinbase_config.json
     
     Returns:
-        CoinbaseCredentials with api_key, api_secret
+        CoinbaseCredentials with api_key, api_secret. Results read from a
+        config file are cached until the file or the env vars change;
+        ``load_credentials.cache_clear()`` empties the cache.
     
     Raises:
         ValueError: If credentials are not found or incomplete
@@ -43,25 +79,14 @@ def load_credentials(
     if config_path is None:
         config_path = str(Path.home() / ".coinbase_config.json")
     
-    config_file = Path(config_path)
-    if config_file.exists():
-        try:
-            with config_file.open("r") as f:
-                cfg = json.load(f)
-            api_key = cfg.get("api_key") or api_key
-            api_secret = cfg.get("api_secret") or api_secret
-        except Exception as e:
-            raise ValueError(f"Failed to load config from {config_path}: {e}")
-    
-    if not api_key or not api_secret:
-        raise ValueError(
-            "Missing Coinbase credentials. Provide via:\n"
-            "  - Environment: CB_API_KEY, CB_API_SECRET\n"
-            f"  - Config file: {config_path}\n"
-            "  - CB_CONFIG_PATH env var to override config location"
-        )
-    
-    return CoinbaseCredentials(api_key=api_key, api_secret=api_secret)
+    try:
+        st = Path(config_path).stat()
+    except OSError:
+        raise _missing_credentials(config_path) from None
+    return _load_from_file(config_path, st.st_mtime_ns, st.st_size, api_key, api_secret)
+
+
+load_credentials.cache_clear = _load_from_file.cache_clear  # type: ignore[attr-defined]
 
 
 def save_config(